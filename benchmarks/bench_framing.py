@@ -0,0 +1,58 @@
+'''Benchmark :mod:`circbuf.framing` against reading lines per byte.
+
+Usage::
+
+    python -m benchmarks.bench_framing
+'''
+import timeit
+
+import circbuf
+from circbuf import framing
+
+
+def readlines_per_byte(buf):
+    '''Split lines iterating per byte over buf.
+    '''
+    lines, line = [], bytearray()
+    for val in buf:
+        line.append(val)
+        if val == 0x0a:
+            lines.append(bytes(line))
+            line = bytearray()
+    return lines
+
+
+def readlines(buf):
+    return list(iter(lambda: framing.readline(buf), None))
+
+
+def readlines_frames(buf):
+    return [bytes(frame) for frame in framing.frames(buf, b'\n')]
+
+
+def setup(size, line_length):
+    buf = circbuf.CircBuf(size)
+    line = bytes(line_length - 1) + b'\n'
+    buf.write(line * ((size - 1) // line_length))
+    return buf
+
+
+def main(number=20):
+    fns = (readlines_per_byte, readlines, readlines_frames)
+    print('{:>10} {:>6} '.format('size', 'line') +
+          ' '.join('{:>20}'.format(fn.__name__) for fn in fns))
+    for size in (2 ** 12, 2 ** 16):
+        for line_length in (16, 256):
+            result = []
+            for fn in fns:
+                elapsed = 0.
+                for _ in range(number):
+                    buf = setup(size, line_length)
+                    elapsed += timeit.Timer(lambda: fn(buf)).timeit(1)
+                result.append(elapsed / number)
+            print('{:>10} {:>6} '.format(size, line_length) +
+                  ' '.join('{:>18.1f}us'.format(t * 1e6) for t in result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+'''Benchmark :func:`circbuf.seek_to_pattern` against the former, per byte
+implementation.
+
+Usage::
+
+    python -m benchmarks.bench_seek_to_pattern
+'''
+import functools
+import itertools
+import operator
+import timeit
+try:
+    from collections import Iterable
+except ImportError:
+    from collections.abc import Iterable
+
+import circbuf
+
+
+def seek_to_pattern_per_byte(buf, pattern):
+    '''Former implementation, iterating per byte over buf.
+    '''
+    def check_pattern(it, pattern):
+        ch = next(it)
+        if ch != pattern[0]:
+            return
+        return True if len(pattern) == 1 else check_pattern(it, pattern[1:])
+
+    if not isinstance(pattern, Iterable):
+        pattern = (pattern,)
+
+    try:
+        while True:
+            it = itertools.dropwhile(
+                functools.partial(operator.ne, pattern[0]), buf)
+            if check_pattern(it, pattern):
+                return len(buf)
+    except StopIteration:
+        pass
+
+    return len(buf)
+
+
+PATTERN = bytes.fromhex('7e 7e 01')
+
+
+def setup(size, offset):
+    '''Fill a buffer wrapping around its end, pattern at offset.
+    '''
+    buf = circbuf.CircBuf(size)
+    with buf.producer_buf:
+        buf.produced(size // 2)
+    with buf.consumer_buf:
+        buf.consumed(size // 2)
+    noise = bytes(itertools.islice(itertools.cycle(range(0x7e)), offset))
+    buf.write(noise + PATTERN)
+    return buf
+
+
+def main(number=20):
+    print('{:>10} {:>10} {:>12} {:>12}'.format(
+        'size', 'offset', 'per byte', 'find'))
+    for size in (2 ** 12, 2 ** 16):
+        for offset in (0, size // 4, size - 1 - len(PATTERN)):
+            result = []
+            for fn in (seek_to_pattern_per_byte, circbuf.seek_to_pattern):
+                bufs = [setup(size, offset) for _ in range(number)]
+                elapsed = 0.
+                for buf in bufs:
+                    timer = timeit.Timer(functools.partial(fn, buf, PATTERN))
+                    elapsed += timer.timeit(1)
+                result.append(elapsed / number)
+            print('{:>10} {:>10} {:>10.1f}us {:>10.1f}us'.format(
+                size, offset, *(t * 1e6 for t in result)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+'''Benchmark the cross-process throughput of
+:class:`circbuf.shared.SharedCircBuf` against
+:func:`multiprocessing.Pipe`.
+
+Usage::
+
+    python -m benchmarks.bench_shared
+'''
+import multiprocessing
+import time
+
+from circbuf import shared
+
+
+def produce_shared(buf, total, chunk):
+    data = memoryview(bytes(chunk))
+    written = 0
+    while written < total:
+        with buf.producer_buf as mv:
+            cnt = min(len(mv), chunk, total - written)
+            mv[:cnt] = data[:cnt]
+            buf.produced(cnt)
+        written += cnt
+        if not cnt:
+            time.sleep(0)
+    buf.close()
+
+
+def consume_shared(buf, total):
+    received = 0
+    while received < total:
+        with buf.consumer_buf as mv:
+            cnt = buf.consumed(len(mv))
+        received += cnt
+        if not cnt:
+            time.sleep(0)
+
+
+def produce_pipe(conn, total, chunk):
+    data = bytes(chunk)
+    for _ in range(total // chunk):
+        conn.send_bytes(data)
+    conn.close()
+
+
+def consume_pipe(conn, total):
+    received = 0
+    while received < total:
+        received += len(conn.recv_bytes())
+
+
+def shared_circbuf(total, chunk, size):
+    buf = shared.SharedCircBuf(size, sync='spsc')
+    try:
+        process = multiprocessing.Process(target=produce_shared,
+                                          args=(buf, total, chunk))
+        start = time.perf_counter()
+        process.start()
+        consume_shared(buf, total)
+        process.join()
+        return time.perf_counter() - start
+    finally:
+        buf.close()
+        buf.unlink()
+
+
+def pipe(total, chunk, size):
+    rx, tx = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=produce_pipe,
+                                      args=(tx, total, chunk))
+    start = time.perf_counter()
+    process.start()
+    tx.close()
+    consume_pipe(rx, total)
+    process.join()
+    return time.perf_counter() - start
+
+
+def main(total=2 ** 28):
+    print('{:>10} {:>8} {:>16} {:>16}'.format('size', 'chunk',
+                                              'SharedCircBuf', 'Pipe'))
+    for size in (2 ** 16, 2 ** 20):
+        for chunk in (2 ** 10, 2 ** 14):
+            result = (fn(total, chunk, size) for fn in (shared_circbuf, pipe))
+            print('{:>10} {:>8} '.format(size, chunk) +
+                  ' '.join('{:>12.1f}MB/s'.format(total / t / 1e6)
+                           for t in result))
+
+
+if __name__ == '__main__':
+    main()
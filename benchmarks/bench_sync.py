@@ -0,0 +1,59 @@
+'''Benchmark the throughput of a producer and a consumer thread with lock
+and with single producer, single consumer synchronisation.
+
+Usage::
+
+    python -m benchmarks.bench_sync
+'''
+import sys
+import threading
+import time
+
+import circbuf
+
+
+def transfer(buf, total, chunk):
+    '''Write total bytes in chunks from this thread, read them from another
+    thread using the producer and consumer buffers.
+    '''
+    def consume():
+        received = 0
+        while received < total:
+            with buf.consumer_buf as mv:
+                cnt = buf.consumed(len(mv))
+            received += cnt
+            if not cnt:
+                time.sleep(0)
+
+    thread = threading.Thread(target=consume)
+    thread.start()
+    written = 0
+    while written < total:
+        with buf.producer_buf as mv:
+            cnt = buf.produced(min(len(mv), chunk, total - written))
+        written += cnt
+        if not cnt:
+            time.sleep(0)
+    thread.join()
+
+
+def main(total=2 ** 26):
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print('GIL {}'.format('enabled' if gil else 'disabled'))
+    print('{:>10} {:>8} {:>6} {:>12}'.format('size', 'chunk', 'sync',
+                                             'throughput'))
+    for size in (2 ** 12, 2 ** 16):
+        for chunk in (64, 1024):
+            # keep the number of calls constant across chunk sizes
+            cnt = total * chunk // 1024
+            for sync in ('lock', 'spsc'):
+                buf = circbuf.CircBuf(size, sync=sync)
+                start = time.perf_counter()
+                transfer(buf, cnt, chunk)
+                elapsed = time.perf_counter() - start
+                print('{:>10} {:>8} {:>6} {:>8.1f}MB/s'.format(
+                    size, chunk, sync, cnt / elapsed / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+'''Benchmark suite of the hot paths of :class:`circbuf.CircBuf` across
+capacities from 4 KiB to 64 MiB, with the data starting at the beginning of
+the buffer or wrapping around its end. Results are stored as JSON, which
+may be compared against the results of another commit.
+
+Usage::
+
+    python -m benchmarks.suite -o results.json
+    python -m benchmarks.suite -o new.json --compare results.json
+'''
+import argparse
+import datetime
+import itertools
+import json
+import platform
+import socket
+import subprocess
+import threading
+import time
+
+import circbuf
+
+
+CAPACITIES = tuple(2 ** n for n in range(12, 27, 2))
+WRAPS = ('aligned', 'wrapped')
+# bytes transferred per run at most, so big capacities don't dominate
+VOLUME = 2 ** 22
+PATTERN = bytes.fromhex('7e 7e 01')
+
+
+def _buffer(capacity, wrap):
+    '''Create an empty buffer, see :func:`_reset`.
+    '''
+    buf = circbuf.CircBuf(capacity)
+    _reset(buf, wrap)
+    return buf
+
+
+def _reset(buf, wrap):
+    '''Empty buf and move its tail to the beginning, or past the middle if
+    wrapped, so the data wraps around the end. Each run is set up by it, as
+    the previous run left the tail anywhere.
+    '''
+    buf.skip(len(buf))
+    start = buf.capacity // 2 + 1 if wrap == 'wrapped' else 0
+    with buf.producer_buf:
+        buf.produced((start - buf._head) & (buf.capacity - 1))
+    buf.skip(len(buf))
+
+
+def _noise(cnt):
+    return bytes(itertools.islice(itertools.cycle(range(0x7e)), cnt))
+
+
+def bench_write(capacity, wrap, chunk):
+    '''Write in chunks of chunk bytes, drained whenever full.
+    '''
+    buf = _buffer(capacity, wrap)
+    data = bytes(chunk)
+    total = min(VOLUME, capacity - 1) // chunk * chunk
+
+    def run():
+        written = 0
+        while written < total:
+            cnt = buf.write(data)
+            if cnt is None:
+                buf.skip(len(buf))
+            else:
+                written += cnt
+        buf.skip(len(buf))
+    return run, total, lambda: _reset(buf, wrap)
+
+
+def bench_iter(capacity, wrap):
+    '''Drain per byte by iteration.
+    '''
+    buf = _buffer(capacity, wrap)
+    # iterating per byte is slow, limit the volume further
+    total = min(VOLUME // 16, capacity - 1)
+
+    def setup():
+        _reset(buf, wrap)
+        buf.write(_noise(total))
+
+    def run():
+        for _ in itertools.islice(buf, total):
+            pass
+        buf.skip(len(buf))
+    return run, total, setup
+
+
+def bench_recv(capacity, wrap, chunk):
+    '''Receive from a socket pair by :func:`circbuf.recv`.
+    '''
+    buf = _buffer(capacity, wrap)
+    rx, tx = socket.socketpair()
+    data = bytes(chunk)
+    total = min(VOLUME, capacity - 1) // chunk * chunk
+
+    def run():
+        received = 0
+        while received < total:
+            if buf.space_avail < chunk:
+                buf.skip(len(buf))
+            tx.sendall(data)
+            cnt = 0
+            while cnt < chunk:
+                before = len(buf)
+                circbuf.recv(buf, rx.recv_into)
+                cnt += len(buf) - before
+            received += cnt
+        buf.skip(len(buf))
+
+    def teardown():
+        rx.close()
+        tx.close()
+    return run, total, lambda: _reset(buf, wrap), teardown
+
+
+def bench_seek_to_pattern(capacity, wrap, position):
+    '''Seek to the pattern placed early, late or absent.
+    '''
+    buf = _buffer(capacity, wrap)
+    total = capacity - 1
+    offset = {'early': total // 100, 'late': total - len(PATTERN),
+              'absent': None}[position]
+    if offset is None:
+        data = _noise(total)
+    else:
+        data = _noise(offset) + PATTERN + _noise(total - offset -
+                                                 len(PATTERN))
+
+    def setup():
+        _reset(buf, wrap)
+        buf.write(data)
+
+    def run():
+        circbuf.seek_to_pattern(buf, PATTERN)
+    return run, total, setup
+
+
+def bench_ping_pong(capacity, wrap, chunk):
+    '''Bounce chunk bytes between two threads through a pair of buffers,
+    waiting by blocking reads.
+    '''
+    ping, pong = _buffer(capacity, wrap), _buffer(capacity, wrap)
+    rounds = 1000
+    data = bytes(chunk)
+
+    def setup():
+        _reset(ping, wrap)
+        _reset(pong, wrap)
+
+    def echo():
+        for _ in range(rounds):
+            pong.write(ping.read(chunk, block=True), block=True)
+
+    def run():
+        thread = threading.Thread(target=echo)
+        thread.start()
+        for _ in range(rounds):
+            ping.write(data, block=True)
+            pong.read(chunk, block=True)
+        thread.join()
+    return run, 2 * rounds * chunk, setup
+
+
+BENCHMARKS = (
+    (bench_write, 'chunk', (64, 4096, 65536)),
+    (bench_iter, None, (None,)),
+    (bench_recv, 'chunk', (1024, 65536)),
+    (bench_seek_to_pattern, 'position', ('early', 'late', 'absent')),
+    (bench_ping_pong, 'chunk', (64, 4096)),
+)
+
+
+def measure(bench, params, repeat):
+    '''Run bench with params repeat times, each in its own setup.
+
+    :returns: ``dict`` of the bytes per run and the run times in seconds
+    '''
+    run, total, setup, teardown = (bench(**params) + (None, None))[:4]
+    times = []
+    try:
+        for _ in range(repeat):
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+    finally:
+        if teardown is not None:
+            teardown()
+    return {'bytes': total, 'times': times}
+
+
+def _commit():
+    try:
+        return subprocess.check_output(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _key(result):
+    return json.dumps([result['name'], result['params']], sort_keys=True)
+
+
+def run_suite(capacities=CAPACITIES, repeat=5, select=None):
+    '''Run all benchmarks, printing their throughput.
+
+    :param capacities: buffer lengths to run each benchmark with
+    :param repeat: runs per benchmark, the fastest one is reported
+    :param select: run benchmarks whose name contains select only
+    :returns: ``dict`` serialisable to JSON
+    '''
+    results = []
+    print('{:<22} {:>10} {:>8} {:>10} {:>12}'.format(
+        'benchmark', 'capacity', 'wrap', 'param', 'throughput'))
+    for bench, name, values in BENCHMARKS:
+        bench_name = bench.__name__[len('bench_'):]
+        if select is not None and select not in bench_name:
+            continue
+        for capacity, wrap, value in itertools.product(capacities, WRAPS,
+                                                       values):
+            if name == 'chunk' and value >= capacity:
+                continue
+            params = {'capacity': capacity, 'wrap': wrap}
+            if name is not None:
+                params[name] = value
+            result = measure(bench, params, repeat)
+            result.update(name=bench_name, params=params,
+                          best=min(result['times']))
+            results.append(result)
+            print('{:<22} {:>10} {:>8} {:>10} {:>8.1f}MB/s'.format(
+                bench_name, capacity, wrap, '' if value is None else value,
+                result['bytes'] / result['best'] / 1e6))
+    return {
+        'commit': _commit(),
+        'date': datetime.datetime.now().isoformat(),
+        'python': platform.python_implementation() + ' ' +
+        platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+    }
+
+
+def compare(base, results, threshold=.1):
+    '''Print the change of the best time of each benchmark found in both.
+
+    :param threshold: relative slow down reported as regression
+    :returns: number of regressions
+    '''
+    before = {_key(result): result for result in base['results']}
+    regressions = 0
+    print('compared to {}'.format(base.get('commit') or base.get('date')))
+    for result in results['results']:
+        old = before.get(_key(result))
+        if old is None:
+            continue
+        change = result['best'] / old['best'] - 1
+        regressed = change > threshold
+        regressions += regressed
+        print('{:<22} {:<62} {:>+7.1%}{}'.format(
+            result['name'], json.dumps(result['params'], sort_keys=True),
+            change, ' REGRESSION' if regressed else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-o', '--output', help='JSON file to store to')
+    parser.add_argument('--compare', metavar='JSON',
+                        help='results to compare against')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--quick', action='store_true',
+                        help='capacities up to 1 MiB only')
+    parser.add_argument('--select', help='run benchmarks matching only')
+    args = parser.parse_args(argv)
+
+    capacities = tuple(c for c in CAPACITIES
+                       if not args.quick or c <= 2 ** 20)
+    results = run_suite(capacities, args.repeat, args.select)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            return 1 if compare(json.load(f), results) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
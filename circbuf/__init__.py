@@ -1,8 +1,9 @@
 import sys
+import os
 import operator
 import functools
-import itertools
 import threading
+import time
 try:
     import contextlib2 as contextlib
     from collections import Iterable
@@ -10,9 +11,11 @@ except ImportError:
     import contextlib
     from collections.abc import Iterable
 from contextlib import contextmanager
+from . import _mirror, stream, wakeup
 
 
-__all__ = ('ResourceManager', 'CircBuf', 'recv', 'seek_to_pattern')
+__all__ = ('ResourceManager', 'CircBuf', 'recv', 'recv_from', 'send_to',
+           'drain_to_fd', 'fill_from_fd', 'seek_to_pattern')
 
 
 def _require_lock(name):
@@ -62,25 +65,243 @@ class ResourceManager:
         self._release_resource()
 
 
+class _NullLock:
+    '''Lock which is always acquired.
+    '''
+
+    __slots__ = ()
+
+    def acquire(self, blocking=True, timeout=-1):
+        return True
+
+    def release(self):
+        pass
+
+    def locked(self):
+        return True
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        pass
+
+
+class _TimedLock:
+    '''Lock accumulating the time spent waiting for it in stats[key].
+    '''
+
+    __slots__ = ('_lock', '_stats', '_key')
+
+    def __init__(self, lock, stats, key):
+        self._lock = lock
+        self._stats = stats
+        self._key = key
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter()
+        try:
+            return self._lock.acquire(True, timeout)
+        finally:
+            self._stats[self._key] += time.perf_counter() - start
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self):
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+class _Segments(tuple):
+    '''Tuple of :class:`memoryview`, released as a context manager.
+    '''
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for mv in self:
+            mv.release()
+
+
+_variants = {}
+
+
+def _variant(cls, *mixins):
+    '''Subclass cls with mixins, which override methods rather than
+    checking the configuration per call.
+    '''
+    if not mixins:
+        return cls
+    key = (cls,) + mixins
+    try:
+        return _variants[key]
+    except KeyError:
+        return _variants.setdefault(key, type(
+            cls.__name__, mixins + (cls,),
+            {'__slots__': (), '__module__': cls.__module__}))
+
+
 class CircBuf(Iterable):
     '''An implementation of a circular buffer, derived from
     `include/linux/circ_buf.h`_.
 
+    :param size: buffer length, power of 2
+    :param mirrored: map the buffer twice, back to back, so producer and
+        consumer buffers never wrap; size must be a multiple of
+        :data:`mmap.PAGESIZE`, requires ``memfd_create``
+    :param sync: ``'lock'`` to synchronise access by locks, or ``'spsc'``
+        if there is a single producer and a single consumer thread at most,
+        which makes the buffer lock-free: :meth:`produced` and
+        :meth:`consumed` publish the indices by a single store and skip
+        lock checks, producer and consumer buffers are plain
+        :class:`memoryview`
+    :param overflow: ``'reject'`` to write only what fits, or
+        ``'overwrite'`` to drop the oldest data to make room, which requires
+        ``sync='lock'``; writing then waits for the consumer lock, e.g. until
+        :attr:`consumer_buf` is released, though never for space, so block
+        and timeout of :meth:`write` are ignored
+    :param realign: if overwrite, drop up to a record boundary: a record
+        size, or ``bytes`` terminating records, so the consumer never sees a
+        torn record; the written data is expected to start on a boundary
+
+    :param stats: ``True`` to collect statistics, see :meth:`stats`, or a
+        function to call on events, accepting the event and the buffer:
+        ``'high_water'`` on a new peak count, ``'full'`` if :meth:`write`
+        or :meth:`write_many` wrote less than requested, ``'empty'`` if a
+        read found the buffer empty
+    :param max_size: resize automatically up to max_size: double on
+        :meth:`write` or :meth:`write_many`, thus :meth:`transfer_to` into
+        the buffer, not fitting twice in a row, halve, though not below
+        size, once the count stayed below a quarter of the buffer length
+        for 256 consumptions; requires ``sync='lock'`` and
+        ``overflow='reject'``
+
+    .. attribute:: dropped
+
+       if overwrite, number of bytes dropped, either buffered or written
+
+    .. method:: stats(reset=False)
+
+       if stats, snapshot of the statistics: bytes ``produced`` and
+       ``consumed``, peak count ``high_water``, number of ``full`` writes
+       and ``empty`` reads, and the time in seconds spent waiting for the
+       producer and consumer locks, ``producer_lock_wait`` and
+       ``consumer_lock_wait``; the statistics are cleared if reset
+
     .. _`include/linux/circ_buf.h`:
         https://github.com/torvalds/linux/blob/v3.2/include/linux/circ_buf.h
     '''
 
-    __slots__ = ('_buf', '_head', '_tail', '_consumer_lock', '_producer_lock',
-                 '__consumer_mv', '__producer_mv')
+    __slots__ = ('_buf', '_mirror', '_head', '_tail', '_consumer_lock',
+                 '_producer_lock', '__consumer_mv', '__producer_mv',
+                 '__consumer_mvs', '__producer_mvs', '_readable', '_writable',
+                 '_readers', '_writers', '_realign', '_dropped', '_stats',
+                 '_on_stats', '_resize_policy', '_eof')
+
+    def __new__(cls, *args, **kwargs):
+        mixins = ()
+        if kwargs.get('sync', 'lock') == 'spsc':
+            mixins += (_SPSC,)
+        if kwargs.get('overflow', 'reject') == 'overwrite':
+            mixins += (_Overwrite,)
+        if kwargs.get('max_size') is not None:
+            mixins += (_AutoResize,)
+        if kwargs.get('stats'):
+            # outermost, so it observes the other mixins
+            mixins = (_Stats,) + mixins
+        return super().__new__(_variant(cls, *mixins))
 
-    def __init__(self, size=2 ** 12):
+    def __init__(self, size=2 ** 12, mirrored=False, *, sync='lock',
+                 overflow='reject', realign=None, stats=False,
+                 max_size=None):
         if size & (size - 1):
             raise ValueError('size must be power of 2')
-        self._buf = bytearray(size)
+        self._init_sync(sync)
+        self._init_overflow(overflow, realign)
+        self._init_resize(size, max_size, overflow)
+        self._init_stats(stats)
+        self._buf, self._mirror = self._allocate(size, mirrored)
         self._head = 0
         self._tail = 0
-        self._consumer_lock = threading.Lock()
-        self._producer_lock = threading.Lock()
+
+    def _allocate(self, size, mirrored):
+        ''':returns: buffer of size along with its mirror, if mirrored
+        '''
+        if mirrored:
+            return _mirror.allocate(size)
+        return bytearray(size), None
+
+    def _init_sync(self, sync):
+        if sync not in ('lock', 'spsc'):
+            raise ValueError('sync must be either lock or spsc')
+        if sync == 'spsc':
+            self._consumer_lock = self._producer_lock = _NullLock()
+        else:
+            self._consumer_lock = threading.Lock()
+            self._producer_lock = threading.Lock()
+        lock = threading.Lock()
+        self._readable = threading.Condition(lock)
+        self._writable = threading.Condition(lock)
+        # thresholds waited for, along with the function to wake the waiter
+        self._readers = []
+        self._writers = []
+        # set by feed_eof()
+        self._eof = False
+
+    def _init_overflow(self, overflow, realign):
+        if overflow not in ('reject', 'overwrite'):
+            raise ValueError('overflow must be either reject or overwrite')
+        if overflow == 'reject':
+            if realign is not None:
+                raise ValueError('realign requires overwrite')
+            return
+        if isinstance(self._consumer_lock, _NullLock):
+            raise ValueError('overwrite requires lock sync')
+        if isinstance(realign, int):
+            if realign < 1:
+                raise ValueError('realign must be positive')
+        elif realign is not None:
+            realign = bytes(realign)
+            if not realign:
+                raise ValueError('realign must not be empty')
+        self._realign = realign
+        self._dropped = 0
+
+    def _init_resize(self, size, max_size, overflow):
+        if max_size is None:
+            return
+        if max_size & (max_size - 1) or max_size < size:
+            raise ValueError('max_size must be power of 2, at least size')
+        if isinstance(self._consumer_lock, _NullLock):
+            raise ValueError('max_size requires lock sync')
+        if overflow != 'reject':
+            raise ValueError('max_size requires reject overflow')
+        # minimum and maximum size, writes not fitting, low consumptions
+        self._resize_policy = [size, max_size, 0, 0]
+
+    def _init_stats(self, stats):
+        if not stats:
+            return
+        if stats is not True and not callable(stats):
+            raise ValueError('stats must be a bool or callable')
+        self._on_stats = None if stats is True else stats
+        self._stats = _Stats._cleared()
+        if not isinstance(self._consumer_lock, _NullLock):
+            self._producer_lock = _TimedLock(
+                self._producer_lock, self._stats, 'producer_lock_wait')
+            self._consumer_lock = _TimedLock(
+                self._consumer_lock, self._stats, 'consumer_lock_wait')
 
     def __len__(self):
         ''':returns: count in buffer
@@ -114,12 +335,80 @@ class CircBuf(Iterable):
 
     def _producer_mv(self):
         buf, head = self._buf, self._head
+        if self._mirror is not None:
+            return self._mirror[head: head + self.space_avail]
         return memoryview(buf)[head: head + self.space_to_end]
 
     def _consumer_mv(self):
         buf, tail = self._buf, self._tail
+        if self._mirror is not None:
+            return self._mirror[tail:tail + len(self)]
         return memoryview(buf)[tail:tail + self.cnt_to_end]
 
+    def _producer_mvs(self):
+        ''':returns: producer buffer, split into the segment up to the end of
+            the buffer and the wrapped segment
+        '''
+        # snapshot the space prior the consumer may free more of it
+        space = self.space_avail
+        first = self._producer_mv()[:space]
+        return first, memoryview(self._buf)[:space - len(first)]
+
+    def _consumer_mvs(self, cnt=None, start=0):
+        ''':param cnt: limit of bytes to expose, defaults to the count in
+            buffer
+        :param start: offset relative to the tail to expose from
+        :returns: consumer buffer, split into the segment up to the end of
+            the buffer and the wrapped segment
+        '''
+        # snapshot the count prior the producer may add to it
+        stop = len(self)
+        first = self._consumer_mv()
+        if cnt is not None:
+            stop = min(start + cnt, stop)
+        end = len(first)
+        if stop <= end:
+            return first[start:stop], first[:0]
+        return first[start:], memoryview(self._buf)[max(start - end, 0):
+                                                    stop - end]
+
+    def _search(self, sub, start, end):
+        return self._buf.find(sub, start, end)
+
+    def _find(self, sub, start=0, stop=None):
+        ''':param sub: ``bytes`` to find
+        :param start: offset relative to the tail to search from
+        :param stop: offset relative to the tail to search up to
+        :returns: lowest offset relative to the tail where sub is found,
+            -1 if not found
+        '''
+        buf, size = self._buf, self.capacity
+        head, tail = self._head, self._tail
+        cnt = (head - tail) & (size - 1)
+        if stop is not None:
+            cnt = min(cnt, stop)
+        end = min(cnt, size - tail)
+        if not sub:
+            return start if start <= cnt else -1
+
+        if start < end:
+            pos = self._search(sub, tail + start, tail + end)
+            if pos >= 0:
+                return pos - tail
+            if cnt > end:
+                # sub may straddle the end of the buffer
+                lo = max(start, end - len(sub) + 1)
+                seam = bytes(buf[tail + lo:tail + end]) + bytes(
+                    buf[:min(len(sub) - 1, cnt - end)])
+                pos = seam.find(sub)
+                if pos >= 0:
+                    return lo + pos
+        if cnt > end:
+            pos = self._search(sub, max(start - end, 0), cnt - end)
+            if pos >= 0:
+                return end + pos
+        return -1
+
     @property
     def space_avail(self):
         ''':returns: number of bytes available in the buffer
@@ -158,14 +447,55 @@ class CircBuf(Iterable):
 
         return ResourceManager(acquire, release)
 
+    @property
+    def producer_bufs(self):
+        ''':returns: producer buffer, split into the segment up to the end of
+            the buffer and the wrapped segment
+        :rtype: ``tuple`` of two :class:`memoryview`
+        '''
+        def acquire():
+            self._producer_lock.acquire()
+            self.__producer_mvs = self._producer_mvs()
+            return self.__producer_mvs
+
+        def release():
+            for mv in self.__producer_mvs:
+                mv.release()
+            self._producer_lock.release()
+
+        return ResourceManager(acquire, release)
+
+    @property
+    def consumer_bufs(self):
+        ''':returns: consumer buffer, split into the segment up to the end of
+            the buffer and the wrapped segment
+        :rtype: ``tuple`` of two :class:`memoryview`
+        '''
+        def acquire():
+            self._consumer_lock.acquire()
+            self.__consumer_mvs = self._consumer_mvs()
+            return self.__consumer_mvs
+
+        def release():
+            for mv in self.__consumer_mvs:
+                mv.release()
+            self._consumer_lock.release()
+
+        return ResourceManager(acquire, release)
+
     @_require_lock('_producer_lock')
     def produced(self, cnt):
         ''':param cnt: written bytes
         :returns: written bytes
         '''
-        if cnt > self.space_to_end:
+        return self._produced(cnt)
+
+    def _produced(self, cnt):
+        if cnt > self.space_avail:
             raise ValueError('cnt bigger than buffer length')
         self._head = (self._head + cnt) & (self.capacity - 1)
+        if self._readers:
+            self._notify(self._readable, self._readers, len(self))
         return cnt
 
     @_require_lock('_consumer_lock')
@@ -173,11 +503,127 @@ class CircBuf(Iterable):
         ''':param cnt: consumed bytes
         :returns: consumed bytes
         '''
+        return self._consumed(cnt)
+
+    def _consumed(self, cnt):
         if cnt > len(self):
             raise ValueError('cnt bigger than buffer length')
         self._tail = (self._tail + cnt) & (self.capacity - 1)
+        if self._writers:
+            self._notify(self._writable, self._writers, self.space_avail)
         return cnt
 
+    @staticmethod
+    def _notify(cond, waiters, level):
+        with cond:
+            for threshold, wake in tuple(waiters):
+                if level >= threshold:
+                    wake()
+
+    def _wait(self, cond, waiters, level, threshold, timeout):
+        waiter = threshold, cond.notify_all
+        with cond:
+            waiters.append(waiter)
+            try:
+                return cond.wait_for(lambda: level() >= threshold, timeout)
+            finally:
+                waiters.remove(waiter)
+
+    def feed_eof(self):
+        '''Signal no more data will be produced, wakes all waiters for
+        data, e.g. readers of :meth:`as_reader`.
+        '''
+        self._eof = True
+        self._notify(self._readable, self._readers, self.capacity)
+
+    def wait_readable(self, cnt=1, timeout=None):
+        '''Wait until at least cnt bytes are in the buffer.
+
+        :param cnt: count to wait for
+        :param timeout: timeout in seconds, waits forever if ``None``
+        :returns: ``False`` if timed out, ``True`` otherwise
+        '''
+        if cnt >= self.capacity:
+            raise ValueError('cnt bigger than buffer length')
+        return self._wait(self._readable, self._readers,
+                          self.__len__, cnt, timeout)
+
+    def wait_writable(self, space=1, timeout=None):
+        '''Wait until at least space bytes are available in the buffer.
+
+        :param space: space to wait for
+        :param timeout: timeout in seconds, waits forever if ``None``
+        :returns: ``False`` if timed out, ``True`` otherwise
+        '''
+        if space >= self.capacity:
+            raise ValueError('space bigger than buffer length')
+        return self._wait(self._writable, self._writers,
+                          lambda: self.space_avail, space, timeout)
+
+    def readable_fd(self, cnt=1):
+        '''File descriptor to register with :mod:`selectors` along with
+        sockets, readable while at least cnt bytes are in the buffer.
+
+        :param cnt: count to signal at
+        :returns: file descriptor, to close once done
+        :rtype: :class:`circbuf.wakeup.WakeupFd`
+        '''
+        if not 0 < cnt < self.capacity:
+            raise ValueError('cnt out of buffer bounds')
+        return wakeup.WakeupFd(self, self.__len__, cnt,
+                               self._readers, self._writers)
+
+    def writable_fd(self, space=1):
+        '''File descriptor to register with :mod:`selectors` along with
+        sockets, readable while at least space bytes are available in the
+        buffer.
+
+        :param space: space to signal at
+        :returns: file descriptor, to close once done
+        :rtype: :class:`circbuf.wakeup.WakeupFd`
+        '''
+        if not 0 < space < self.capacity:
+            raise ValueError('space out of buffer bounds')
+        return wakeup.WakeupFd(self, lambda: self.space_avail, space,
+                               self._writers, self._readers)
+
+    def resize(self, size):
+        '''Change the buffer length, keeping the buffered data. The new
+        buffer is allocated prior acquiring the producer and the consumer
+        lock to copy the data, so it must not be called while holding
+        either.
+
+        :param size: new buffer length, power of 2
+        :raises ValueError: if the buffered data doesn't fit
+        '''
+        if size & (size - 1):
+            raise ValueError('size must be power of 2')
+        if isinstance(self._consumer_lock, _NullLock):
+            raise RuntimeError('resize requires lock sync')
+        buf, mirror = self._allocate(size, self._mirror is not None)
+        with self._producer_lock, self._consumer_lock:
+            self._swap(buf, mirror)
+
+    def _swap(self, buf, mirror):
+        '''Copy the buffered data to the start of buf and switch to it,
+        requires both locks.
+        '''
+        cnt = len(self)
+        if cnt >= len(buf):
+            raise ValueError('buffered data exceeds size')
+        first, second = self._consumer_mvs()
+        with memoryview(buf) as dst:
+            dst = dst.cast('B')
+            end = first.nbytes
+            dst[:end] = first.cast('B')
+            dst[end:end + second.nbytes] = second.cast('B')
+        first.release()
+        second.release()
+        self._buf, self._mirror = buf, mirror
+        self._head, self._tail = cnt, 0
+        if self._writers:
+            self._notify(self._writable, self._writers, self.space_avail)
+
     def __iter__(self):
 
         def generator():
@@ -189,45 +635,503 @@ class CircBuf(Iterable):
             def release():
                 self._consumer_lock.release()
 
-            with ResourceManager(acquire, release) as mv:
+            # a segment at a time, the data may wrap around the end
+            while len(self):
+                with ResourceManager(acquire, release) as mv:
+                    try:
+                        for val in map(operator.itemgetter(0), mv):
+                            self.consumed(1)
+                            yield val
+                    except TypeError:
+                        for val in bytes(mv):
+                            self.consumed(1)
+                            yield val
+
+        return generator()
+
+    def iter_chunks(self, max_size=None, copy=False):
+        '''Generator consuming the buffer a contiguous segment at a time,
+        continuing across the end of the buffer until it's empty.
+
+        A chunk is consumed and its :class:`memoryview` released once the
+        generator is advanced. The consumer lock is held until the
+        generator is exhausted or closed.
+
+        :param max_size: maximum chunk length, unlimited if ``None``
+        :param copy: yield ``bytes``, rather than :class:`memoryview`
+        '''
+        with self._consumer_lock:
+            while True:
+                mv = self._consumer_mv()
+                if max_size is not None:
+                    mv = mv[:max_size]
+                cnt = len(mv)
+                if not cnt:
+                    return
                 try:
-                    for val in map(operator.itemgetter(0), mv):
-                        self.consumed(1)
-                        yield val
-                except TypeError:
-                    for val in bytes(mv):
-                        self.consumed(1)
-                        yield val
+                    yield bytes(mv) if copy else mv
+                finally:
+                    mv.release()
+                self.consumed(cnt)
 
-            if len(self):
-                generator()
+    def readinto(self, b):
+        '''Read bytes into a pre-allocated, writable bytes-like object.
 
-        return generator()
+        :param b: buffer to read into
+        :returns: number of bytes read
+        '''
+        with memoryview(b) as dst, self._consumer_lock:
+            dst = dst.cast('B')
+            first, second = self._consumer_mvs(len(dst))
+            cnt = len(first)
+            dst[:cnt] = first
+            dst[cnt:cnt + len(second)] = second
+            cnt += len(second)
+            self.consumed(cnt)
+        return cnt
+
+    def read(self, n=-1, block=False, timeout=None):
+        ''':param n: maximum number of bytes to read, reads all if
+            negative or ``None``
+        :param block: wait until ``min(n, capacity - 1)`` bytes, or a
+            single byte if n is negative or ``None``, are in the buffer
+        :param timeout: timeout in seconds if block, waits forever if
+            ``None``; if timed out, reads whatever is in the buffer
+        :returns: ``bytes`` read, empty if the buffer is empty
+        '''
+        if block:
+            self.wait_readable(
+                1 if n is None or n < 0 else min(n, self.capacity - 1),
+                timeout)
+        with self._consumer_lock:
+            first, second = self._consumer_mvs(
+                None if n is None or n < 0 else n)
+            result = bytes().join((first, second))
+            self.consumed(len(first) + len(second))
+        return result
+
+    def read1(self, n=-1):
+        '''Read at most the consumer buffer, i.e. in a single copy.
+
+        :param n: maximum number of bytes to read, reads the consumer
+            buffer if negative or ``None``
+        :returns: ``bytes`` read, empty if the buffer is empty
+        '''
+        with self._consumer_lock:
+            mv = self._consumer_mv()
+            if n is not None and n >= 0:
+                mv = mv[:n]
+            result = bytes(mv)
+            self.consumed(len(mv))
+        return result
+
+    def skip(self, n):
+        ''':param n: maximum number of bytes to skip
+        :returns: number of bytes skipped
+        '''
+        with self._consumer_lock:
+            return self.consumed(min(n, len(self)))
+
+    def peek(self, n=-1):
+        '''Read without consuming. As it doesn't acquire the consumer lock,
+        it may be used while holding :attr:`consumer_buf`.
+
+        :param n: maximum number of bytes to read, reads all if
+            negative or ``None``
+        :returns: ``bytes`` read
+        '''
+        return bytes().join(self._consumer_mvs(
+            None if n is None or n < 0 else n))
+
+    def find(self, sub, start=0, end=None):
+        '''Find without consuming. As it doesn't acquire the consumer lock,
+        it may be used while holding :attr:`consumer_buf`.
+
+        :param sub: ``bytes`` or ``int`` to find
+        :param start: offset relative to the tail to search from
+        :param end: offset relative to the tail to search up to
+        :returns: lowest offset relative to the tail where sub is found,
+            -1 if not found
+        '''
+        if isinstance(sub, int):
+            sub = bytes((sub,))
+        cnt = len(self)
+        # as bytes.find, rather than clamping start
+        if start > cnt:
+            return -1
+        start, end, _ = slice(start, end).indices(cnt)
+        return self._find(sub, start, end)
 
+    def __getitem__(self, key):
+        '''Index relative to the tail without consuming.
 
-    def write(self, b):
+        :param key: ``int`` or ``slice``
+        :returns: ``int``, or ``bytes`` if key is a ``slice``
+        '''
+        cnt = len(self)
+        if isinstance(key, slice):
+            start, stop, step = key.indices(cnt)
+            lo, hi = (start, stop) if step > 0 else (stop + 1, start + 1)
+            data = bytes().join(self._consumer_mvs(max(hi - lo, 0), lo))
+            return data if step == 1 else data[::step]
+        if key < 0:
+            key += cnt
+        if not 0 <= key < cnt:
+            raise IndexError('CircBuf index out of range')
+        return self._buf[(self._tail + key) & (self.capacity - 1)]
+
+    def write(self, b, block=False, timeout=None):
         ''':param b: ``bytes`` to ``bytearray`` to write
-        :returns: number of bytes written
+        :param block: wait for space until all of b is written
+        :param timeout: timeout in seconds if block, waits forever if
+            ``None``
+        :returns: number of bytes written, ``None`` if none
+        '''
+        if not block:
+            return self._write(b)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with memoryview(b) as view:
+            view = view.cast('B')
+            written = 0
+            while True:
+                written += self._write(view[written:]) or 0
+                if written == len(view):
+                    break
+                # wait for a batch rather than each consumed byte
+                space = min(len(view) - written, self.capacity // 2)
+                if not self.wait_writable(
+                        space, None if deadline is None else
+                        deadline - time.monotonic()):
+                    written += self._write(view[written:]) or 0
+                    break
+        return written if written else None
+
+    def _write(self, b):
+        with memoryview(b) as view, self._producer_lock, \
+                _Segments(self._producer_mvs()) as (first, second):
+            view = view.cast('B')
+            cnt = min(len(first), len(view))
+            first[:cnt] = view[:cnt]
+            rest = min(len(second), len(view) - cnt)
+            second[:rest] = view[cnt:cnt + rest]
+            if cnt + rest:
+                self.produced(cnt + rest)
+        return cnt + rest or None
+
+    def write_many(self, buffers, partial=False):
+        '''Write the concatenation of buffers, e.g. header, payload and
+        trailer, acquiring the producer lock once and copying each of them
+        directly.
+
+        :param buffers: iterable of bytes-like objects
+        :param partial: write as much as fits, rather than nothing unless
+            all of buffers fit
+        :returns: number of bytes written, ``None`` if none
+        '''
+        views = [memoryview(b).cast('B') for b in buffers]
+        try:
+            with self._producer_lock, \
+                    _Segments(self._producer_mvs()) as (first, second):
+                end = len(first)
+                space = end + len(second)
+                if not partial and sum(map(len, views)) > space:
+                    return None
+                written = 0
+                for view in views:
+                    cnt = min(len(view), space - written)
+                    # split at the end of the buffer
+                    split = min(max(end - written, 0), cnt)
+                    first[written:written + split] = view[:split]
+                    second[max(written - end, 0):
+                           max(written + cnt - end, 0)] = view[split:cnt]
+                    written += cnt
+                    if written == space:
+                        break
+                if written:
+                    self.produced(written)
+        finally:
+            for view in views:
+                view.release()
+        return written or None
+
+    def transfer_to(self, other, n=-1):
+        '''Move data to other, copying directly from the consumer buffer to
+        the producer buffer of other.
+
+        :param other: buffer to move to
+        :param n: maximum number of bytes to move, moves all if negative or
+            ``None``
+        :returns: number of bytes moved
         '''
-        def do(written):
-            with self.producer_buf as mv:
-                length = min(map(len, (mv, b[written:])))
-                if not length:
-                    return written
-                mv[: length] = b[: length]
-                self.produced(length)
-            written += length
-            if written == towrite or length == 0:
-                return written
-            return do(written)
+        with self._consumer_lock, _Segments(self._consumer_mvs(
+                None if n is None or n < 0 else n)) as segments:
+            return self.consumed(other.write_many(segments, partial=True)
+                                 or 0)
 
-        if not min(self.space_avail, len(b)):
-            return None
+    def as_reader(self, block=True, timeout=None):
+        ''':returns: raw stream reading from the buffer, e.g. to wrap by
+            :class:`io.BufferedReader`
+        :rtype: :class:`circbuf.stream.CircBufReader`
+        '''
+        return stream.CircBufReader(self, block, timeout)
+
+    def as_writer(self, block=True, timeout=None):
+        ''':returns: raw stream writing to the buffer, signalling EOF to
+            the readers once closed
+        :rtype: :class:`circbuf.stream.CircBufWriter`
+        '''
+        return stream.CircBufWriter(self, block, timeout)
+
+    def writelines(self, lines):
+        '''Write lines, all or nothing, see :meth:`write_many`.
+        '''
+        return self.write_many(lines)
+
+
+class _SPSC:
+    '''Single producer, single consumer synchronisation of
+    :class:`CircBuf`.
+    '''
+
+    __slots__ = ()
+
+    produced = CircBuf.produced.__wrapped__
+    consumed = CircBuf.consumed.__wrapped__
+
+    @property
+    def producer_buf(self):
+        return self._producer_mv()
+
+    @property
+    def consumer_buf(self):
+        return self._consumer_mv()
+
+    @property
+    def producer_bufs(self):
+        return _Segments(self._producer_mvs())
+
+    @property
+    def consumer_bufs(self):
+        return _Segments(self._consumer_mvs())
+
+
+class _Overwrite:
+    '''Overwrite overflow of :class:`CircBuf`, dropping the oldest data.
+    '''
+
+    __slots__ = ()
+
+    @property
+    def dropped(self):
+        return self._dropped
+
+    def _boundary(self, need, cnt, find):
+        ''':param need: count to drop at least
+        :param cnt: count available to drop
+        :param find: function finding the record terminator, accepting
+            ``(sub, start, end)``
+        :returns: count to drop so the remainder starts on a boundary
+        '''
+        realign = self._realign
+        if realign is None:
+            return need
+        if isinstance(realign, int):
+            return min(-(-need // realign) * realign, cnt)
+        pos = find(realign, max(need - len(realign), 0), cnt)
+        return cnt if pos < 0 else pos + len(realign)
 
-        towrite = len(b)
-        result = do(0)
+    def _write(self, b):
+        with memoryview(b) as view:
+            view = view.cast('B')
+            fit = self.capacity - 1
+            if len(view) > fit:
+                # the head of b would be overwritten by its own tail
+                skip = self._boundary(len(view) - fit, len(view),
+                                      bytes(view).find)
+                self._dropped += skip
+                view = view[skip:]
+            if not view:
+                return None
+            with self._producer_lock:
+                need = len(view) - self.space_avail
+                if need > 0:
+                    with self._consumer_lock:
+                        self._dropped += self.consumed(
+                            self._boundary(need, len(self), self._find))
+                first, second = self._producer_mvs()
+                cnt = min(len(first), len(view))
+                first[:cnt] = view[:cnt]
+                second[:len(view) - cnt] = view[cnt:]
+                return self.produced(len(view))
 
-        return result if result else None
+    def write(self, b, block=False, timeout=None):
+        # room is always made, waiting for space would wait for nothing
+        return self._write(b)
+
+    def write_many(self, buffers, partial=False):
+        # room is made for all of buffers at once; not by self._write,
+        # which mixins observing write_many would observe twice
+        return _Overwrite._write(self, bytes().join(buffers))
+
+
+def _skipped(views, cnt):
+    ''':returns: views without their first cnt bytes
+    '''
+    for view in views:
+        if cnt < len(view):
+            yield view[cnt:]
+        cnt = max(cnt - len(view), 0)
+
+
+class _AutoResize:
+    '''Resizing of :class:`CircBuf` following the load.
+    '''
+
+    __slots__ = ()
+
+    _GROW_AFTER = 2
+    _SHRINK_AFTER = 256
+
+    def _write(self, b):
+        with memoryview(b) as view:
+            view = view.cast('B')
+            written = super()._write(view) or 0
+            policy = self._resize_policy
+            if written == len(view):
+                policy[2] = 0
+                return written or None
+            policy[2] += 1
+            if policy[2] >= self._GROW_AFTER and self.capacity < policy[1]:
+                policy[2] = 0
+                self.resize(2 * self.capacity)
+                written += super()._write(view[written:]) or 0
+        return written or None
+
+    def write_many(self, buffers, partial=False):
+        views = [memoryview(b).cast('B') for b in buffers]
+        try:
+            total = sum(map(len, views))
+            written = super().write_many(views, partial) or 0
+            policy = self._resize_policy
+            if written == total:
+                policy[2] = 0
+                return written or None
+            policy[2] += 1
+            if policy[2] >= self._GROW_AFTER and self.capacity < policy[1]:
+                policy[2] = 0
+                self.resize(2 * self.capacity)
+                written += super().write_many(
+                    _skipped(views, written), partial) or 0
+            return written or None
+        finally:
+            for view in views:
+                view.release()
+
+    def _consumed(self, cnt):
+        level = len(self)
+        cnt = super()._consumed(cnt)
+        policy, size = self._resize_policy, self.capacity
+        if level >= size // 4 or size <= policy[0]:
+            policy[3] = 0
+            return cnt
+        policy[3] += 1
+        # the consumer lock is held, don't wait for the producer lock as
+        # it's acquired prior the consumer lock by resize()
+        if policy[3] >= self._SHRINK_AFTER and \
+                self._producer_lock.acquire(False):
+            try:
+                policy[3] = 0
+                self._swap(*self._allocate(size // 2,
+                                           self._mirror is not None))
+            finally:
+                self._producer_lock.release()
+        return cnt
+
+
+class _Stats:
+    '''Statistics of :class:`CircBuf`, collected by overriding the
+    methods rather than checking whether enabled per call.
+    '''
+
+    __slots__ = ()
+
+    @staticmethod
+    def _cleared():
+        return {'produced': 0, 'consumed': 0, 'high_water': 0, 'full': 0,
+                'empty': 0, 'producer_lock_wait': 0.,
+                'consumer_lock_wait': 0.}
+
+    def stats(self, reset=False):
+        snapshot = dict(self._stats)
+        if reset:
+            self._stats.update(self._cleared())
+        return snapshot
+
+    def _event(self, event):
+        if self._on_stats is not None:
+            self._on_stats(event, self)
+
+    def _produced(self, cnt):
+        cnt = super()._produced(cnt)
+        stats = self._stats
+        stats['produced'] += cnt
+        level = len(self)
+        if level > stats['high_water']:
+            stats['high_water'] = level
+            self._event('high_water')
+        return cnt
+
+    def _consumed(self, cnt):
+        cnt = super()._consumed(cnt)
+        self._stats['consumed'] += cnt
+        return cnt
+
+    def _write(self, b):
+        written = super()._write(b)
+        with memoryview(b) as view:
+            self._full(written, view.nbytes)
+        return written
+
+    def write_many(self, buffers, partial=False):
+        views = [memoryview(b).cast('B') for b in buffers]
+        try:
+            written = super().write_many(views, partial)
+            self._full(written, sum(map(len, views)))
+            return written
+        finally:
+            for view in views:
+                view.release()
+
+    def _full(self, written, nbytes):
+        if (written or 0) < nbytes:
+            self._stats['full'] += 1
+            self._event('full')
+
+    def _empty(self, result, n=-1):
+        if not result and n != 0:
+            self._stats['empty'] += 1
+            self._event('empty')
+        return result
+
+    def readinto(self, b):
+        return self._empty(super().readinto(b))
+
+    def read(self, n=-1, block=False, timeout=None):
+        return self._empty(super().read(n, block, timeout), n)
+
+    def read1(self, n=-1):
+        return self._empty(super().read1(n), n)
+
+
+def _require_bytes(buf, func):
+    '''Ensure buf counts bytes rather than records, as helpers pass what
+    they transferred to :meth:`CircBuf.produced` and
+    :meth:`CircBuf.consumed`.
+    '''
+    if hasattr(buf, 'record_size'):
+        raise ValueError('{} requires a buffer counting bytes'
+                         .format(func.__name__))
 
 
 def recv(buf, fn, *args):
@@ -238,10 +1142,74 @@ def recv(buf, fn, *args):
     to read into and returns the number of bytes received
     :param args: arguments for `fn`
     '''
+    _require_bytes(buf, recv)
     with buf.producer_buf as mv:
         buf.produced(fn(mv, *args))
 
 
+def recv_from(buf, sock, flags=0):
+    '''Helper to receive from a socket into both segments of buf with a
+    single call to :meth:`socket.socket.recvmsg_into`
+
+    :param buf: buffer to receive into
+    :param sock: socket to receive from
+    :param flags: flags passed to :meth:`socket.socket.recvmsg_into`
+    :returns: number of bytes received
+    '''
+    _require_bytes(buf, recv_from)
+    with buf.producer_bufs as mvs:
+        return buf.produced(sock.recvmsg_into(mvs, 0, flags)[0])
+
+
+def send_to(buf, sock, flags=0):
+    '''Helper to send both segments of buf to a socket with a single call to
+    :meth:`socket.socket.sendmsg`
+
+    :param buf: buffer to send from
+    :param sock: socket to send to
+    :param flags: flags passed to :meth:`socket.socket.sendmsg`
+    :returns: number of bytes sent
+    '''
+    _require_bytes(buf, send_to)
+    with buf.consumer_bufs as mvs:
+        return buf.consumed(sock.sendmsg(mvs, (), flags))
+
+
+def drain_to_fd(buf, fd, n=-1):
+    '''Helper to write both segments of buf to a file descriptor with a
+    single call to :func:`os.writev`
+
+    :param buf: buffer to write from
+    :param fd: file descriptor to write to, e.g. a file or a pipe
+    :param n: maximum number of bytes to write, writes all if negative or
+        ``None``
+    :returns: number of bytes written
+    '''
+    _require_bytes(buf, drain_to_fd)
+    with buf._consumer_lock, _Segments(buf._consumer_mvs(
+            None if n is None or n < 0 else n)) as mvs:
+        return buf.consumed(os.writev(fd, mvs) if len(mvs[0]) else 0)
+
+
+def fill_from_fd(buf, fd, n=-1):
+    '''Helper to read from a file descriptor into both segments of buf with
+    a single call to :func:`os.readv`
+
+    :param buf: buffer to read into
+    :param fd: file descriptor to read from, e.g. a file or a pipe
+    :param n: maximum number of bytes to read, fills buf if negative or
+        ``None``
+    :returns: number of bytes read, 0 at EOF or if buf is full
+    '''
+    _require_bytes(buf, fill_from_fd)
+    with buf._producer_lock, _Segments(buf._producer_mvs()) as mvs:
+        first, second = mvs
+        if n is not None and n >= 0:
+            first, second = first[:n], second[:max(n - len(first), 0)]
+        return buf.produced(os.readv(fd, (first, second)) if len(first)
+                            else 0)
+
+
 @contextmanager
 def _ignored(*exceptions):
     try:
@@ -251,28 +1219,28 @@ def _ignored(*exceptions):
 
 
 def seek_to_pattern(buf, pattern):
-    '''Helper to seek buf to pattern
+    '''Helper to seek buf to pattern, i.e. consume up to and including
+    pattern. If pattern is not found, all but the longest tail of buf, which
+    pattern starts with, are consumed.
 
     :param buf: buffer to seek to pattern
     :param pattern: pattern to seek to
     :returns: remaining buf length
     '''
-    def check_pattern(it, pattern):
-        ch = next(it)
-        if ch != pattern[0]:
-            return
-        return True if len(pattern) == 1 else check_pattern(it, pattern[1:])
-
     if not isinstance(pattern, Iterable):
         pattern = (pattern,)
+    pattern = bytes(pattern)
 
-    try:
-        while True:
-            it = itertools.dropwhile(
-                functools.partial(operator.ne, pattern[0]), buf)
-            if check_pattern(it, pattern):
-                return len(buf)
-    except StopIteration:
-        pass
+    with buf._consumer_lock:
+        cnt = len(buf)
+        pos = buf._find(pattern, 0, cnt)
+        if pos >= 0:
+            buf.consumed(pos + len(pattern))
+        else:
+            keep = min(len(pattern) - 1, cnt)
+            partial = bytes().join(buf._consumer_mvs(keep, cnt - keep))
+            while keep and not pattern.startswith(partial[-keep:]):
+                keep -= 1
+            buf.consumed(cnt - keep)
 
     return len(buf)
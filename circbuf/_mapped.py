@@ -0,0 +1,81 @@
+'''Circular buffer mapping its header and data, shared with other processes
+or persisted to a file.
+
+The header holds the capacity, a magic number and a generation counter,
+followed by the head and tail indices, each in a separate cache line.
+'''
+from . import CircBuf
+
+
+__all__ = ('MappedCircBuf', 'HEADER')
+
+_LINE = 64
+_CAPACITY, _MAGIC, _GENERATION = range(3)
+_HEAD, _TAIL = _LINE // 8, 2 * _LINE // 8
+HEADER = 3 * _LINE
+MAGIC = int.from_bytes(b'circbuf\x01', 'little')
+
+
+class MappedCircBuf(CircBuf):
+    '''Base of buffers whose header and data are mapped.
+    '''
+
+    __slots__ = ('_index',)
+
+    def _map(self, buf, size=None):
+        '''Map the header and the data.
+
+        :param buf: :class:`memoryview` of the header followed by the data
+        :param size: capacity to initialise the header with, read from the
+            header if ``None``
+        '''
+        index = buf[:HEADER].cast('Q')
+        if size is None:
+            if index[_MAGIC] != MAGIC:
+                index.release()
+                raise ValueError('no circular buffer header found')
+            size = index[_CAPACITY]
+        else:
+            index[_CAPACITY] = size
+            index[_GENERATION] = 0
+            index[_HEAD] = index[_TAIL] = 0
+            index[_MAGIC] = MAGIC
+        if len(buf) < HEADER + size:
+            index.release()
+            raise ValueError('mapping shorter than capacity')
+        self._index = index
+        self._buf, self._mirror = buf[HEADER:HEADER + size], None
+
+    @property
+    def _head(self):
+        return self._index[_HEAD]
+
+    @_head.setter
+    def _head(self, value):
+        self._index[_HEAD] = value
+
+    @property
+    def _tail(self):
+        return self._index[_TAIL]
+
+    @_tail.setter
+    def _tail(self, value):
+        self._index[_TAIL] = value
+
+    @property
+    def generation(self):
+        ''':returns: generation counter
+        '''
+        return self._index[_GENERATION]
+
+    def _allocate(self, size, mirrored):
+        raise RuntimeError('mapped buffers can not be resized')
+
+    def _search(self, sub, start, end):
+        # search the underlying mmap, a memoryview doesn't support find()
+        pos = self._buf.obj.find(sub, HEADER + start, HEADER + end)
+        return pos - HEADER if pos >= 0 else pos
+
+    def _unmap(self):
+        self._index.release()
+        self._buf.release()
@@ -0,0 +1,84 @@
+'''Mirrored backing store for :class:`circbuf.CircBuf`.
+
+The same ``memfd_create`` region is mapped twice, back to back, so that any
+region of the buffer, including one crossing its end, is contiguous in
+memory.
+'''
+import os
+import mmap
+import ctypes
+
+
+__all__ = ('SUPPORTED', 'allocate')
+
+_PROT_NONE = 0
+_MAP_FIXED = 0x10
+_MAP_FAILED = ctypes.c_void_p(-1).value
+
+try:
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _mmap = _libc.mmap
+    _mmap.restype = ctypes.c_void_p
+    _mmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_int,
+                      ctypes.c_int, ctypes.c_int, ctypes.c_long)
+    _munmap = _libc.munmap
+    _munmap.restype = ctypes.c_int
+    _munmap.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+    SUPPORTED = (hasattr(os, 'memfd_create') and
+                 hasattr(mmap, 'MAP_ANONYMOUS'))
+except (OSError, AttributeError):
+    SUPPORTED = False
+
+
+def _map(addr, length, prot, flags, fd):
+    result = _mmap(addr, length, prot, flags, fd, 0)
+    if result in (None, _MAP_FAILED):
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    return result
+
+
+def _mapping(addr, length):
+    '''Wrap the mapping at addr, it is unmapped once the last
+    :class:`memoryview` referring to it is released.
+    '''
+    def __del__(self):
+        _munmap(ctypes.addressof(self), ctypes.sizeof(self))
+
+    cls = type('_Mapping', (ctypes.c_ubyte * length,),
+               {'__slots__': (), '__del__': __del__})
+    return cls.from_address(addr)
+
+
+def allocate(size):
+    '''Allocate a mirrored buffer.
+
+    :param size: buffer length, a multiple of :data:`mmap.PAGESIZE`
+    :returns: the buffer, as :class:`mmap.mmap`, and a :class:`memoryview`
+        of twice its length, mapping the buffer twice
+    '''
+    if not SUPPORTED:
+        raise RuntimeError('mirrored buffers are not supported on this '
+                           'platform')
+    if size % mmap.PAGESIZE:
+        raise ValueError('size must be a multiple of {}'.format(
+            mmap.PAGESIZE))
+
+    fd = os.memfd_create('circbuf', os.MFD_CLOEXEC)
+    try:
+        os.ftruncate(fd, size)
+        base = _map(None, 2 * size, _PROT_NONE,
+                    mmap.MAP_PRIVATE | mmap.MAP_ANONYMOUS, -1)
+        try:
+            for addr in (base, base + size):
+                _map(addr, size, mmap.PROT_READ | mmap.PROT_WRITE,
+                     mmap.MAP_SHARED | _MAP_FIXED, fd)
+        except OSError:
+            _munmap(base, 2 * size)
+            raise
+        mirror = memoryview(_mapping(base, 2 * size)).cast('B')
+        buf = mmap.mmap(fd, size)
+    finally:
+        os.close(fd)
+
+    return buf, mirror
@@ -0,0 +1,220 @@
+''':mod:`asyncio` integration of :class:`circbuf.CircBuf`.
+
+:class:`CircBufProtocol` receives from a transport directly into the
+producer buffer, :class:`AsyncCircBuf` awaits data or space in the buffer.
+The latter may be used along with threads producing or consuming the same
+buffer. The protocol must be the only producer though, as the transport
+receives into the producer buffer without holding the producer lock.
+'''
+import asyncio
+
+from . import framing
+
+
+__all__ = ('AsyncCircBuf', 'CircBufProtocol')
+
+
+def _set(fut):
+    if not fut.done():
+        fut.set_result(None)
+
+
+class AsyncCircBuf:
+    '''Awaitable facade of a :class:`circbuf.CircBuf`.
+
+    :param buf: buffer to wrap
+    :param limit: count at which no more data is produced to buf, e.g. as
+        reading is paused, defaults to the buffer length
+    '''
+
+    def __init__(self, buf, limit=None):
+        self.buf = buf
+        self._limit = buf.capacity - 1 if limit is None else limit
+
+    def feed_eof(self):
+        '''Signal no more data will be produced, see
+        :meth:`circbuf.CircBuf.feed_eof`.
+        '''
+        self.buf.feed_eof()
+
+    def at_eof(self):
+        ''':returns: ``True`` if the buffer is empty and EOF was fed to it
+        '''
+        return self.buf._eof and not len(self.buf)
+
+    async def _wait(self, cond, waiters, level, threshold):
+        if threshold >= self.buf.capacity:
+            raise ValueError('threshold bigger than buffer length')
+        loop = asyncio.get_running_loop()
+        while level() < threshold:
+            fut = loop.create_future()
+            waiter = threshold, lambda: loop.call_soon_threadsafe(_set, fut)
+            with cond:
+                waiters.append(waiter)
+            try:
+                # the level may have changed prior the waiter was added
+                if level() < threshold:
+                    await fut
+            finally:
+                with cond:
+                    waiters.remove(waiter)
+        return level() >= threshold
+
+    async def wait_readable(self, cnt=1):
+        '''Wait until at least cnt bytes are in the buffer, or EOF was fed
+        to it, e.g. by :meth:`feed_eof`, :class:`circbuf.pump.Pump` or
+        closing :meth:`circbuf.CircBuf.as_writer`.
+
+        :returns: ``False`` if at EOF with less than cnt bytes, ``True``
+            otherwise
+        '''
+        buf = self.buf
+        # EOF wakes all waiters for data, see CircBuf.feed_eof()
+        await self._wait(buf._readable, buf._readers,
+                         lambda: buf.capacity if buf._eof else len(buf), cnt)
+        return len(buf) >= cnt
+
+    async def wait_writable(self, space=1):
+        '''Wait until at least space bytes are available in the buffer.
+        '''
+        buf = self.buf
+        return await self._wait(buf._writable, buf._writers,
+                                lambda: buf.space_avail, space)
+
+    async def read(self, n=-1):
+        '''Read up to n bytes, waits for a single byte at least.
+
+        :returns: ``bytes`` read, empty at EOF
+        '''
+        await self.wait_readable()
+        return self.buf.read(n)
+
+    async def readexactly(self, n):
+        '''Read exactly n bytes, which may exceed the buffer length.
+
+        :raises asyncio.IncompleteReadError: if EOF is reached prior
+        '''
+        result = bytearray()
+        while len(result) < n:
+            # consume what is there, so a paused producer may resume
+            if not await self.wait_readable():
+                raise asyncio.IncompleteReadError(bytes(result), n)
+            result += self.buf.read(n - len(result))
+        return bytes(result)
+
+    async def read_until(self, delim=b'\n'):
+        '''Read a frame terminated by delim.
+
+        :returns: ``bytes`` read including delim
+        :raises asyncio.IncompleteReadError: if EOF is reached prior
+        :raises ValueError: if the count reached limit without delim
+        '''
+        while True:
+            frame = framing.read_until(self.buf, delim)
+            if frame is not None:
+                return frame
+            cnt = len(self.buf)
+            if cnt >= self._limit:
+                raise ValueError('limit reached without delim')
+            if not await self.wait_readable(cnt + 1):
+                raise asyncio.IncompleteReadError(self.buf.read(), None)
+
+    def write(self, b):
+        '''Write without waiting, see :meth:`circbuf.CircBuf.write`.
+        '''
+        return self.buf.write(b)
+
+    async def drain(self):
+        '''Wait until the buffer is empty, i.e. the consumer caught up.
+        '''
+        await self.wait_writable(self.buf.capacity - 1)
+
+
+class CircBufProtocol(asyncio.BufferedProtocol):
+    '''Protocol receiving directly into the producer buffer of buf. Reading
+    is paused once the count in buf reaches high_water and resumed once it
+    dropped to low_water.
+
+    :param buf: buffer to receive into
+    :param high_water: count to pause reading at, defaults to 3/4 of the
+        buffer length
+    :param low_water: count to resume reading at, defaults to 1/4 of the
+        buffer length
+
+    .. attribute:: reader
+
+       :class:`AsyncCircBuf` of buf, limited to high_water, EOF is fed on
+       connection loss
+    '''
+
+    def __init__(self, buf, high_water=None, low_water=None):
+        self.buf = buf
+        self.transport = None
+        if high_water is None:
+            high_water = buf.capacity * 3 // 4
+        if low_water is None:
+            low_water = buf.capacity // 4
+        if not 0 <= low_water < high_water < buf.capacity:
+            raise ValueError('0 <= low_water < high_water < capacity '
+                             'is required')
+        self.reader = AsyncCircBuf(buf, high_water)
+        self._high_water = high_water
+        self._low_water = low_water
+        self._paused = False
+        self._mv = None
+        self._waiter = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self._loop = asyncio.get_running_loop()
+
+    def connection_lost(self, exc):
+        self._release()
+        self._unregister()
+        self.buf.feed_eof()
+
+    def get_buffer(self, sizehint):
+        self._release()
+        self._mv = self.buf._producer_mv()
+        return self._mv
+
+    def buffer_updated(self, nbytes):
+        buf = self.buf
+        with buf._producer_lock:
+            buf.produced(nbytes)
+        self._release()
+        if not self._paused and len(buf) >= self._high_water:
+            self._pause()
+
+    def eof_received(self):
+        self.buf.feed_eof()
+
+    def _release(self):
+        if self._mv is not None:
+            self._mv.release()
+            self._mv = None
+
+    def _pause(self):
+        self._paused = True
+        self.transport.pause_reading()
+        buf, loop = self.buf, self._loop
+        self._waiter = (buf.capacity - 1 - self._low_water,
+                        lambda: loop.call_soon_threadsafe(self._resume))
+        with buf._writable:
+            buf._writers.append(self._waiter)
+        # the consumer may have caught up prior the waiter was added
+        if len(buf) <= self._low_water:
+            self._resume()
+
+    def _unregister(self):
+        if self._waiter is not None:
+            with self.buf._writable:
+                self.buf._writers.remove(self._waiter)
+            self._waiter = None
+
+    def _resume(self):
+        if self._paused:
+            self._paused = False
+            self._unregister()
+            if not self.transport.is_closing():
+                self.transport.resume_reading()
@@ -0,0 +1,165 @@
+'''Circular buffer broadcasting a single producer to many readers, each
+consuming at its own pace.
+'''
+from . import CircBuf, _NullLock
+
+
+__all__ = ('BroadcastCircBuf', 'BroadcastReader')
+
+
+class BroadcastCircBuf(CircBuf):
+    '''Circular buffer whose data is consumed by each of its readers, see
+    :meth:`reader`. The space available to the producer is bounded by the
+    reader lagging the most; as it holds the count of that reader, the
+    buffer itself may be peeked at, but not consumed from. Data produced
+    while no reader is registered is dropped.
+
+    :param size: buffer length, power of 2
+    :param mirrored: see :class:`circbuf.CircBuf`
+    :param sync: see :class:`circbuf.CircBuf`, applies to each reader
+    :param slow: ``'block'`` to bound the producer by the slowest reader,
+        ``'detach'`` to detach readers lagging by max_lag once producing,
+        or ``'skip'`` to drop the data of such readers; the latter two
+        require ``sync='lock'``
+    :param max_lag: count a reader must lag by to be detached or skipped,
+        defaults to a full buffer
+    '''
+
+    __slots__ = ('_cursors', '_slow', '_max_lag')
+
+    def __init__(self, size=2 ** 12, mirrored=False, *, sync='lock',
+                 slow='block', max_lag=None):
+        if size & (size - 1):
+            raise ValueError('size must be power of 2')
+        if slow not in ('block', 'detach', 'skip'):
+            raise ValueError('slow must be either block, detach or skip')
+        self._init_sync(sync)
+        if slow != 'block' and isinstance(self._consumer_lock, _NullLock):
+            raise ValueError('{} requires lock sync'.format(slow))
+        self._buf, self._mirror = CircBuf._allocate(self, size, mirrored)
+        self._head = 0
+        self._cursors = ()
+        self._slow = None if slow == 'block' else slow
+        self._max_lag = size - 1 if max_lag is None else max_lag
+
+    @property
+    def _tail(self):
+        # tail of the reader lagging the most
+        head, mask = self._head, self.capacity - 1
+        tail = head
+        for reader in self._cursors:
+            cursor = reader._tail
+            if (head - cursor) & mask > (head - tail) & mask:
+                tail = cursor
+        return tail
+
+    @property
+    def readers(self):
+        ''':returns: registered readers
+        :rtype: ``tuple`` of :class:`BroadcastReader`
+        '''
+        return self._cursors
+
+    def reader(self):
+        '''Register a reader, consuming the data produced from now on.
+
+        :rtype: :class:`BroadcastReader`
+        '''
+        with self._producer_lock:
+            reader = BroadcastReader(
+                self, sync='spsc' if isinstance(self._consumer_lock,
+                                                _NullLock) else 'lock')
+            # replace rather than mutate, which the producer may iterate
+            self._cursors += (reader,)
+        return reader
+
+    def _unregister(self, reader):
+        self._cursors = tuple(r for r in self._cursors if r is not reader)
+
+    def _release_slow(self):
+        head, mask = self._head, self.capacity - 1
+        for reader in self._cursors:
+            if (head - reader._tail) & mask < self._max_lag or \
+                    not reader._consumer_lock.acquire(False):
+                continue
+            try:
+                if self._slow == 'detach':
+                    reader._detach()
+                else:
+                    reader._dropped += len(reader)
+                    reader._tail = head
+            finally:
+                reader._consumer_lock.release()
+
+    def _producer_mv(self):
+        if self._slow is not None:
+            self._release_slow()
+        return super()._producer_mv()
+
+    def _producer_mvs(self):
+        if self._slow is not None:
+            self._release_slow()
+        return super()._producer_mvs()
+
+    def _consumed(self, cnt):
+        raise RuntimeError('data must be consumed by a reader')
+
+    def _allocate(self, size, mirrored):
+        raise RuntimeError('broadcast buffers can not be resized')
+
+
+class BroadcastReader(CircBuf):
+    '''Reader of a :class:`BroadcastCircBuf`, see
+    :meth:`BroadcastCircBuf.reader`. It supports the consuming methods of
+    :class:`circbuf.CircBuf` on the data of its buffer.
+    '''
+
+    __slots__ = ('_source', '_detached')
+
+    def __init__(self, source, *, sync='lock'):
+        self._init_sync(sync)
+        self._source = source
+        self._detached = False
+        self._dropped = 0
+        self._buf, self._mirror = source._buf, source._mirror
+        self._tail = source._head
+        # wake waiters of the source, each of them checks its own level
+        self._readable, self._readers = source._readable, source._readers
+        self._writable, self._writers = source._writable, source._writers
+
+    @property
+    def _head(self):
+        return self._tail if self._detached else self._source._head
+
+    @property
+    def dropped(self):
+        ''':returns: number of bytes skipped as lagging
+        '''
+        return self._dropped
+
+    @property
+    def detached(self):
+        ''':returns: ``True`` if detached as lagging, or closed
+        '''
+        return self._detached
+
+    def _detach(self):
+        self._detached = True
+        self._source._unregister(self)
+        if self._writers:
+            self._notify(self._writable, self._writers,
+                         self._source.space_avail)
+
+    def _produced(self, cnt):
+        raise RuntimeError('data must be produced to the source')
+
+    def _allocate(self, size, mirrored):
+        raise RuntimeError('broadcast buffers can not be resized')
+
+    def close(self):
+        '''Unregister from the source, dropping the unconsumed data.
+        '''
+        # the readers of the source are replaced under its producer lock,
+        # acquired prior the consumer lock as by _release_slow()
+        with self._source._producer_lock, self._consumer_lock:
+            self._detach()
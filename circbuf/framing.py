@@ -0,0 +1,132 @@
+'''Framing on top of :class:`circbuf.CircBuf`.
+
+Frames are either terminated by a delimiter or prefixed by their length.
+Incomplete frames are left in the buffer, they are returned once the
+producer completed them.
+'''
+import struct
+
+
+__all__ = ('readline', 'read_until', 'read_frame', 'frames')
+
+
+def _delimited(delim):
+    def span(buf, cnt):
+        pos = buf._find(delim, 0, cnt)
+        if pos < 0:
+            return None
+        return 0, pos + len(delim)
+    return span
+
+
+def _length_prefixed(struct_fmt):
+    header = struct.Struct(struct_fmt)
+
+    def span(buf, cnt):
+        if cnt < header.size:
+            return None
+        length, = header.unpack(buf.peek(header.size))
+        if cnt < header.size + length:
+            if header.size + length >= buf.capacity:
+                raise ValueError('frame length {} exceeds buffer'
+                                 .format(length))
+            return None
+        return header.size, length
+    return span
+
+
+def _framing(delim, struct_fmt):
+    if (delim is None) == (struct_fmt is None):
+        raise ValueError('either delim or struct_fmt is required')
+    if delim is None:
+        return _length_prefixed(struct_fmt)
+    return _delimited(bytes((delim,)) if isinstance(delim, int) else delim)
+
+
+def _next(buf, span):
+    ''':returns: offset and length of the next frame, ``None`` if the
+        buffer holds no complete frame
+    '''
+    cnt = len(buf)
+    result = span(buf, cnt)
+    if result is None and not buf.space_avail:
+        raise ValueError('frame exceeds buffer')
+    return result
+
+
+def _read(buf, span):
+    with buf._consumer_lock:
+        result = _next(buf, span)
+        if result is None:
+            return None
+        offset, length = result
+        frame = bytes().join(buf._consumer_mvs(length, offset))
+        buf.consumed(offset + length)
+    return frame
+
+
+def read_until(buf, delim):
+    '''Read a frame terminated by delim.
+
+    :param buf: buffer to read from
+    :param delim: delimiter, ``bytes`` or ``int``
+    :returns: ``bytes`` read including delim, ``None`` if the buffer holds
+        no complete frame
+    :raises ValueError: if the buffer is full without holding delim
+    '''
+    return _read(buf, _framing(delim, None))
+
+
+def readline(buf):
+    '''Read a line terminated by ``b'\\n'``.
+
+    :param buf: buffer to read from
+    :returns: ``bytes`` read including the line terminator, ``None`` if the
+        buffer holds no complete line
+    :raises ValueError: if the buffer is full without holding a line
+    '''
+    return read_until(buf, b'\n')
+
+
+def read_frame(buf, struct_fmt):
+    '''Read a length prefixed frame.
+
+    :param buf: buffer to read from
+    :param struct_fmt: :mod:`struct` format of the length prefix, e.g.
+        ``'>H'``, the length excludes the prefix itself
+    :returns: ``bytes`` read excluding the length prefix, ``None`` if the
+        buffer holds no complete frame
+    :raises ValueError: if the frame can't fit into the buffer
+    '''
+    return _read(buf, _framing(None, struct_fmt))
+
+
+def frames(buf, delim=None, struct_fmt=None):
+    '''Generator yielding all complete frames of buf, delimited frames
+    include delim, length prefixed frames exclude the length prefix.
+
+    Frames are yielded as :class:`memoryview` if contiguous and as
+    ``bytes`` if they wrap around the end of the buffer. A frame is
+    consumed and its :class:`memoryview` released once the generator is
+    advanced. The consumer lock is held until the generator is exhausted
+    or closed.
+
+    :param buf: buffer to read from
+    :param delim: delimiter, ``bytes`` or ``int``
+    :param struct_fmt: :mod:`struct` format of the length prefix
+    :raises ValueError: if a frame can't fit into the buffer
+    '''
+    span = _framing(delim, struct_fmt)
+    with buf._consumer_lock:
+        while True:
+            result = _next(buf, span)
+            if result is None:
+                return
+            offset, length = result
+            first, second = buf._consumer_mvs(length, offset)
+            try:
+                yield bytes().join((first, second)) if second else first
+            finally:
+                first.release()
+                second.release()
+            buf.consumed(offset + length)
@@ -0,0 +1,104 @@
+'''Circular buffer persisted to a file, surviving crashes.
+'''
+import os
+import mmap
+
+from ._mapped import MappedCircBuf, HEADER, _GENERATION
+
+
+__all__ = ('PersistentCircBuf',)
+
+
+class PersistentCircBuf(MappedCircBuf):
+    '''Circular buffer backed by a memory mapped file, holding the header
+    and the data, which is recovered on reopening.
+
+    As data is produced directly into the mapping, a crash of the process
+    never loses produced data. msync bounds what a crash of the operating
+    system may lose: data is flushed prior to the header, however the
+    operating system may write back the header any time before.
+
+    :param path: file to open, created if it doesn't exist
+    :param size: buffer length, power of 2, ignored if path exists
+    :param msync: ``'never'`` to leave flushing to the operating system,
+        ``'produced'`` to flush on every :meth:`produced`, or a number of
+        bytes to flush after
+    :param sync: see :class:`circbuf.CircBuf`
+
+    .. attribute:: generation
+
+       incremented on every reopening
+    '''
+
+    __slots__ = ('_mmap', '_msync', '_synced', '_unsynced')
+
+    def __init__(self, path, size=2 ** 12, *, msync='never', sync='lock'):
+        if msync == 'never':
+            msync = None
+        elif msync == 'produced':
+            msync = 1
+        elif not isinstance(msync, int) or msync < 1:
+            raise ValueError("msync must be 'never', 'produced' or a "
+                             "positive int")
+        if size & (size - 1):
+            raise ValueError('size must be power of 2')
+        self._init_sync(sync)
+        self._msync = msync
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            create = not os.fstat(fd).st_size
+            if create:
+                os.ftruncate(fd, HEADER + size)
+            self._mmap = mmap.mmap(fd, 0)
+        finally:
+            os.close(fd)
+        view = memoryview(self._mmap)
+        try:
+            self._map(view, size if create else None)
+        except ValueError:
+            view.release()
+            self._mmap.close()
+            raise
+        if create:
+            self._mmap.flush()
+        else:
+            self._index[_GENERATION] += 1
+        self._synced, self._unsynced = self._head, 0
+
+    def _produced(self, cnt):
+        cnt = super()._produced(cnt)
+        self._unsynced += cnt
+        if self._msync is not None and self._unsynced >= self._msync:
+            self.sync()
+        return cnt
+
+    def _flush(self, offset, size):
+        # mmap.flush() requires the offset to be aligned
+        aligned = offset - offset % mmap.ALLOCATIONGRANULARITY
+        self._mmap.flush(aligned, offset + size - aligned)
+
+    def sync(self):
+        '''Flush the data produced since the last flush, then the header.
+        '''
+        head, size = self._head, self.capacity
+        if self._unsynced >= size - 1:
+            self._flush(HEADER, size)
+        else:
+            start = self._synced
+            cnt = (head - start) & (size - 1)
+            end = min(cnt, size - start)
+            if end:
+                self._flush(HEADER + start, end)
+            if cnt > end:
+                self._flush(HEADER, cnt - end)
+        self._flush(0, HEADER)
+        self._synced, self._unsynced = head, 0
+
+    def close(self):
+        '''Flush and close the file, requires all producer and consumer
+        buffers to be released.
+        '''
+        self.sync()
+        self._unmap()
+        self._mmap.close()
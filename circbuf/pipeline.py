@@ -0,0 +1,295 @@
+'''Pipeline of stages, each consuming from a :class:`circbuf.CircBuf` and
+producing to the next one, optionally in a thread per stage.
+
+A stage is a callable accepting a contiguous segment of the upstream
+consumer buffer, as :class:`memoryview`, and the downstream buffer. It
+produces to the downstream buffer and returns the number of bytes consumed
+from the segment. The segment ends at the end of the buffer if the data
+wraps, so a stage must make progress on any segment, given space
+downstream, rather than wait for more contiguous data: consuming nothing
+of a full upstream buffer raises :class:`RuntimeError`.
+
+Once the upstream buffer is empty and at EOF, see
+:meth:`circbuf.CircBuf.feed_eof`, the ``flush`` method of the stage, if
+any, is called with the downstream buffer until it returns ``True``, then
+EOF is fed downstream.
+'''
+import threading
+import time
+import zlib
+
+from . import CircBuf
+
+
+__all__ = ('Pipeline', 'Inflate', 'Deflate', 'CRC32')
+
+
+class _Output:
+    '''Base of stages, whose output may not fit downstream, written once
+    there's space.
+    '''
+
+    def __init__(self):
+        self._pending = b''
+
+    def _emit(self, dst, data):
+        ''':returns: ``True`` if all output is written
+        '''
+        if self._pending:
+            data = self._pending + data
+        cnt = dst.write(data) or 0 if data else 0
+        self._pending = data[cnt:]
+        return not self._pending
+
+
+class Inflate(_Output):
+    '''Decompress :mod:`zlib`, gzip or raw deflate data, limited to the
+    space available downstream.
+
+    :param wbits: see :func:`zlib.decompressobj`
+    '''
+
+    def __init__(self, wbits=zlib.MAX_WBITS):
+        super().__init__()
+        self._decompressor = zlib.decompressobj(wbits)
+
+    def __call__(self, segment, dst):
+        decompressor = self._decompressor
+        with dst.producer_buf as mv:
+            if not len(mv):
+                return 0
+            data = decompressor.decompress(segment, len(mv))
+            mv[:len(data)] = data
+            dst.produced(len(data))
+        # input held back by the limit is consumed once there's space
+        return len(segment) - len(decompressor.unconsumed_tail)
+
+    def flush(self, dst):
+        if self._decompressor is not None:
+            data, self._decompressor = self._decompressor.flush(), None
+            return self._emit(dst, data)
+        return self._emit(dst, b'')
+
+
+class Deflate(_Output):
+    '''Compress to :mod:`zlib`, gzip or raw deflate data.
+
+    :param level: see :func:`zlib.compressobj`
+    :param wbits: see :func:`zlib.compressobj`
+    '''
+
+    def __init__(self, level=-1, wbits=zlib.MAX_WBITS):
+        super().__init__()
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, wbits)
+
+    def __call__(self, segment, dst):
+        if not self._emit(dst, b''):
+            return 0
+        self._emit(dst, self._compressor.compress(segment))
+        return len(segment)
+
+    def flush(self, dst):
+        if self._compressor is not None:
+            data, self._compressor = self._compressor.flush(), None
+            return self._emit(dst, data)
+        return self._emit(dst, b'')
+
+
+class CRC32:
+    '''Pass the data through, computing its CRC-32.
+
+    :param expected: CRC-32 to verify at EOF, if not ``None``
+
+    .. attribute:: crc
+
+       CRC-32 of the data passed so far
+    '''
+
+    def __init__(self, expected=None):
+        self.expected = expected
+        self.crc = 0
+
+    def __call__(self, segment, dst):
+        cnt = dst.write(segment) or 0
+        self.crc = zlib.crc32(segment[:cnt], self.crc)
+        return cnt
+
+    def flush(self, dst):
+        '''
+        :raises ValueError: if the CRC-32 doesn't match expected
+        '''
+        if self.expected is not None and self.crc != self.expected:
+            raise ValueError('CRC-32 mismatch, {:#010x} instead of {:#010x}'
+                             .format(self.crc, self.expected))
+        return True
+
+
+class Pipeline:
+    '''Chain of stages from source to sink, connected by intermediate
+    buffers.
+
+    :param source: buffer the first stage consumes from
+    :param sink: buffer the last stage produces to
+    :param stages: stages, see :mod:`circbuf.pipeline`
+    :param size: length of the intermediate buffers, power of 2
+
+    .. attribute:: buffers
+
+       source, the intermediate buffers and sink
+    '''
+
+    # seconds to wait at most, prior checking whether stopped
+    _POLL = .1
+
+    def __init__(self, source, sink, stages, size=2 ** 16):
+        self._stages = tuple(stages)
+        if not self._stages:
+            raise ValueError('at least a single stage is required')
+        self.buffers = (source,) + tuple(
+            CircBuf(size) for _ in self._stages[1:]) + (sink,)
+        self._stats = [{'bytes_in': 0, 'bytes_out': 0, 'busy': 0.}
+                       for _ in self._stages]
+        self._flushed = [False] * len(self._stages)
+        self._threads = []
+        self._errors = []
+        self._stopped = False
+
+    @property
+    def source(self):
+        ''':returns: buffer the first stage consumes from
+        '''
+        return self.buffers[0]
+
+    @property
+    def sink(self):
+        ''':returns: buffer the last stage produces to
+        '''
+        return self.buffers[-1]
+
+    def _step(self, index):
+        ''':returns: number of bytes consumed, or produced if none consumed
+        '''
+        stage, stats = self._stages[index], self._stats[index]
+        src, dst = self.buffers[index:index + 2]
+        # the stage is the single producer of dst, whose space only grows
+        # while it runs
+        head, space = dst._head, dst.space_avail
+        with src._consumer_lock:
+            mv = src._consumer_mv()
+            try:
+                if not len(mv):
+                    return 0
+                start = time.perf_counter()
+                cnt = stage(mv, dst)
+                stats['busy'] += time.perf_counter() - start
+            finally:
+                mv.release()
+            src.consumed(cnt)
+        produced = (dst._head - head) & (dst.capacity - 1)
+        if not cnt and not produced and space and not src.space_avail:
+            # more data never comes, waiting for it would spin
+            raise RuntimeError('stage {} made no progress on a full buffer'
+                               .format(index))
+        stats['bytes_in'] += cnt
+        stats['bytes_out'] += produced
+        return cnt or produced
+
+    def _finish(self, index):
+        ''':returns: ``True`` once the stage is flushed and EOF fed
+        '''
+        stage, dst = self._stages[index], self.buffers[index + 1]
+        flush = getattr(stage, 'flush', None)
+        head = dst._head
+        done = flush is None or flush(dst)
+        self._stats[index]['bytes_out'] += \
+            (dst._head - head) & (dst.capacity - 1)
+        if not done:
+            return False
+        self._flushed[index] = True
+        dst.feed_eof()
+        return True
+
+    def run(self):
+        '''Run the stages in the calling thread until none makes progress,
+        e.g. as the sink is full or the source is empty.
+
+        :returns: ``True`` once all stages are flushed
+        '''
+        progress = True
+        while progress:
+            progress = False
+            for index, src in enumerate(self.buffers[:-1]):
+                if self._flushed[index]:
+                    continue
+                if self._step(index) or not len(src) and src._eof and \
+                        self._finish(index):
+                    progress = True
+        return all(self._flushed)
+
+    def _work(self, index):
+        src, dst = self.buffers[index:index + 2]
+        try:
+            while not self._stopped and not self._flushed[index]:
+                if self._step(index):
+                    continue
+                cnt = len(src)
+                if not cnt and src._eof:
+                    if not self._finish(index):
+                        dst.wait_writable(1, self._POLL)
+                elif not dst.space_avail:
+                    dst.wait_writable(1, self._POLL)
+                else:
+                    # wait for more data than the stage refused, or EOF
+                    src._wait(src._readable, src._readers,
+                              lambda: src.capacity if src._eof else len(src),
+                              min(cnt + 1, src.capacity - 1), self._POLL)
+        except Exception as exc:
+            self._errors.append(exc)
+            self._stopped = True
+
+    def start(self):
+        '''Run each stage in a worker thread, see :meth:`join`.
+        '''
+        if self._threads:
+            raise RuntimeError('pipeline already started')
+        self._threads = [
+            threading.Thread(target=self._work, args=(index,), daemon=True,
+                             name='circbuf-stage-{}'.format(index))
+            for index in range(len(self._stages))]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        '''Request the worker threads to stop, without flushing.
+        '''
+        self._stopped = True
+
+    def join(self, timeout=None):
+        '''Wait for the worker threads, which finish once EOF passed all
+        stages, or once stopped.
+
+        :param timeout: timeout in seconds for each thread, waits forever if
+            ``None``
+        :returns: ``True`` if all threads finished
+        :raises: the first exception a stage raised
+        '''
+        for thread in self._threads:
+            thread.join(timeout)
+        if self._errors:
+            raise self._errors[0]
+        return not any(thread.is_alive() for thread in self._threads)
+
+    def stats(self):
+        ''':returns: ``list`` of a ``dict`` per stage: the stage ``name``,
+            ``bytes_in`` consumed, ``bytes_out`` produced, seconds ``busy``
+            in the stage and its ``throughput`` consumed per busy second;
+            the stage with the least throughput is the bottleneck
+        '''
+        result = []
+        for stage, stats in zip(self._stages, self._stats):
+            stats = dict(stats, name=getattr(stage, '__name__',
+                                             type(stage).__name__))
+            stats['throughput'] = stats['bytes_in'] / stats['busy'] \
+                if stats['busy'] else 0.
+            result.append(stats)
+        return result
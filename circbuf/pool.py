@@ -0,0 +1,178 @@
+'''Pool of circular buffers sharing preallocated storage, e.g. one buffer per
+connection.
+'''
+import threading
+
+from . import CircBuf
+
+
+__all__ = ('CircBufPool', 'PooledCircBuf')
+
+
+class PooledCircBuf(CircBuf):
+    '''Circular buffer whose data is a slot of a slab of its
+    :class:`CircBufPool`, see :meth:`CircBufPool.acquire`. A buffer without
+    a slot is attached to one once produced to. It must not be used once
+    released.
+    '''
+
+    __slots__ = ('_pool', '_size', '_offset')
+
+    def __init__(self, pool, size, *, sync='lock'):
+        self._init_sync(sync)
+        self._pool, self._size = pool, size
+        self._buf = self._offset = self._mirror = None
+        self._head = 0
+        self._tail = 0
+
+    @property
+    def capacity(self):
+        ''':returns: buffer length
+        '''
+        return self._size
+
+    @property
+    def attached(self):
+        ''':returns: ``True`` if the buffer holds a slot
+        '''
+        return self._buf is not None
+
+    def _attach(self):
+        self._buf, self._offset = self._pool._take()
+
+    def _detach(self):
+        if self._buf is not None:
+            self._pool._put(self._buf, self._offset)
+            self._buf = self._offset = None
+        self._head = self._tail = 0
+
+    def _producer_mv(self):
+        if self._buf is None:
+            self._attach()
+        return super()._producer_mv()
+
+    def _consumer_mv(self):
+        if self._buf is None:
+            return memoryview(b'')
+        return super()._consumer_mv()
+
+    def _search(self, sub, start, end):
+        # search the slab, a memoryview doesn't support find()
+        offset = self._offset
+        pos = self._buf.obj.find(sub, offset + start, offset + end)
+        return pos - offset if pos >= 0 else pos
+
+    def _allocate(self, size, mirrored):
+        raise RuntimeError('pooled buffers can not be resized')
+
+    def detach(self):
+        '''Return the slot to the pool if the buffer is empty, e.g. once a
+        connection is idle.
+
+        :returns: ``True`` if the buffer holds no slot
+        '''
+        with self._producer_lock, self._consumer_lock:
+            if not len(self):
+                self._detach()
+            return self._buf is None
+
+    def release(self):
+        '''Return the buffer, along with its slot, to the pool, discarding
+        the buffered data, EOF and waiters.
+        '''
+        with self._producer_lock, self._consumer_lock:
+            self._detach()
+            self._eof = False
+            # stale waiters remove themselves from the lists they were
+            # added to, rather than from the ones of the next holder
+            with self._readable:
+                self._readers, self._writers = [], []
+        self._pool._recycle(self)
+
+
+class CircBufPool:
+    '''Pool handing out :class:`PooledCircBuf`, whose data are slots of
+    slabs allocated ahead of time. Released buffers and their slots are
+    recycled rather than allocated per buffer.
+
+    :param size: buffer length, power of 2
+    :param count: slots per slab
+    :param lazy: attach a slot to a buffer once produced to, rather than
+        once acquired
+    :param max_slabs: number of slabs to allocate at most, unbounded if
+        ``None``
+    :param sync: see :class:`circbuf.CircBuf`
+    '''
+
+    def __init__(self, size=2 ** 12, count=2 ** 8, *, lazy=True,
+                 max_slabs=None, sync='lock'):
+        if size & (size - 1):
+            raise ValueError('size must be power of 2')
+        if count < 1 or max_slabs is not None and max_slabs < 1:
+            raise ValueError('count and max_slabs must be positive')
+        self.size = size
+        self.count = count
+        self._lazy = lazy
+        self._max_slabs = max_slabs
+        self._sync = sync
+        self._lock = threading.Lock()
+        self._slabs = []
+        # slots as view of the slab along with its offset in the slab
+        self._free = []
+        self._idle = []
+        self._in_use = 0
+        self._add_slab()
+
+    def _add_slab(self):
+        size = self.size
+        slab = bytearray(size * self.count)
+        view = memoryview(slab)
+        self._slabs.append(slab)
+        self._free.extend((view[offset:offset + size], offset)
+                          for offset in range(len(slab) - size, -1, -size))
+
+    def _take(self):
+        with self._lock:
+            if not self._free:
+                if self._max_slabs is not None and \
+                        len(self._slabs) >= self._max_slabs:
+                    raise RuntimeError('pool exhausted')
+                self._add_slab()
+            return self._free.pop()
+
+    def _put(self, view, offset):
+        with self._lock:
+            self._free.append((view, offset))
+
+    def _recycle(self, buf):
+        with self._lock:
+            self._in_use -= 1
+            self._idle.append(buf)
+
+    def acquire(self):
+        ''':returns: empty buffer
+        :rtype: :class:`PooledCircBuf`
+        :raises RuntimeError: if not lazy and all slots are attached
+        '''
+        with self._lock:
+            buf = self._idle.pop() if self._idle else None
+            self._in_use += 1
+        if buf is None:
+            buf = PooledCircBuf(self, self.size, sync=self._sync)
+        if not self._lazy:
+            try:
+                buf._attach()
+            except RuntimeError:
+                self._recycle(buf)
+                raise
+        return buf
+
+    def occupancy(self):
+        ''':returns: ``dict`` of the number of ``buffers`` in use, of
+            ``idle`` buffers to recycle, of ``attached`` slots and of all
+            ``slots``
+        '''
+        with self._lock:
+            slots = len(self._slabs) * self.count
+            return {'buffers': self._in_use, 'idle': len(self._idle),
+                    'attached': slots - len(self._free), 'slots': slots}
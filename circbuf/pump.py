@@ -0,0 +1,190 @@
+'''Pump moving data between many sockets, or file descriptors, and their
+:class:`circbuf.CircBuf` by a :mod:`selectors` selector, in a single
+thread.
+
+Each registered :class:`Link` pairs a non-blocking socket with a receive
+buffer, filled while it has space, and a transmit buffer, drained while it
+holds data. The interest of the selector follows the buffers, so a full
+receive buffer or an empty transmit buffer cost no events. Both segments of
+a buffer are transferred by a single system call, e.g.
+:func:`circbuf.recv_from` and :func:`circbuf.send_to`.
+'''
+import selectors
+
+from . import recv_from, send_to, fill_from_fd, drain_to_fd
+
+
+__all__ = ('Pump', 'Link')
+
+
+class Link:
+    '''Registration of a socket with a :class:`Pump`.
+
+    .. attribute:: fileobj
+
+       socket, or file descriptor, as registered
+
+    .. attribute:: rx
+
+       buffer receiving from fileobj, or ``None``
+
+    .. attribute:: tx
+
+       buffer transmitting to fileobj, or ``None``
+
+    .. attribute:: callback
+
+       function called with the link after the pump transferred data, or
+       ``None``
+
+    .. attribute:: eof
+
+       ``True`` once fileobj reached EOF, which is fed to rx
+
+    .. attribute:: error
+
+       :class:`OSError` the transfer failed with, after which the link is no
+       longer polled, or ``None``
+    '''
+
+    __slots__ = ('fileobj', 'rx', 'tx', 'callback', 'eof', 'error',
+                 '_events', '_recv', '_send')
+
+    def __init__(self, fileobj, rx, tx, callback):
+        self.fileobj, self.rx, self.tx = fileobj, rx, tx
+        self.callback = callback
+        self.eof = False
+        self.error = None
+        self._events = 0
+        if hasattr(fileobj, 'recvmsg_into'):
+            self._recv, self._send = recv_from, send_to
+        else:
+            fd = fileobj if isinstance(fileobj, int) else fileobj.fileno()
+            self._recv = lambda buf, _: fill_from_fd(buf, fd)
+            self._send = lambda buf, _: drain_to_fd(buf, fd)
+
+    @property
+    def events(self):
+        ''':returns: events the link is polled for, based on the buffers
+        '''
+        events = 0
+        if self.error is not None:
+            return events
+        if self.rx is not None and not self.eof and self.rx.space_avail:
+            events |= selectors.EVENT_READ
+        if self.tx is not None and len(self.tx):
+            events |= selectors.EVENT_WRITE
+        return events
+
+
+class Pump:
+    '''Transfer data between sockets and buffers as they get ready.
+
+    Callbacks run in the thread calling :meth:`poll`; a buffer consumed or
+    produced elsewhere requires :meth:`update` for the pump to notice.
+
+    :param selector: selector to poll, a :class:`selectors.DefaultSelector`
+        if ``None``
+    '''
+
+    def __init__(self, selector=None):
+        self.selector = selectors.DefaultSelector() if selector is None \
+            else selector
+        self._links = {}
+
+    def __len__(self):
+        return len(self._links)
+
+    def register(self, fileobj, rx=None, tx=None, callback=None):
+        '''Pump data from fileobj to rx and from tx to fileobj.
+
+        :param fileobj: non-blocking socket, or file descriptor
+        :param rx: buffer to receive into, or ``None``
+        :param tx: buffer to transmit from, or ``None``
+        :param callback: function called with the :class:`Link` once data
+            was received, space freed in tx, at EOF or on error; the pump
+            updates the interest afterwards, so it may consume rx and
+            produce to tx
+        :returns: the link
+        :rtype: :class:`Link`
+        '''
+        if fileobj in self._links:
+            raise ValueError('{!r} is already registered'.format(fileobj))
+        link = self._links[fileobj] = Link(fileobj, rx, tx, callback)
+        self._update(link)
+        return link
+
+    def unregister(self, fileobj):
+        '''Stop pumping fileobj, without closing it.
+
+        :returns: the link
+        :rtype: :class:`Link`
+        '''
+        link = self._links.pop(fileobj)
+        if link._events:
+            self.selector.unregister(fileobj)
+            link._events = 0
+        return link
+
+    def update(self, fileobj):
+        '''Update the interest in fileobj, e.g. after producing to its tx
+        buffer outside a callback.
+        '''
+        self._update(self._links[fileobj])
+
+    def _update(self, link):
+        events = link.events
+        if events == link._events:
+            return
+        if not events:
+            self.selector.unregister(link.fileobj)
+        elif not link._events:
+            self.selector.register(link.fileobj, events, link)
+        else:
+            self.selector.modify(link.fileobj, events, link)
+        link._events = events
+
+    def poll(self, timeout=None):
+        '''Wait for ready sockets and transfer their data.
+
+        :param timeout: timeout in seconds, waits forever if ``None``
+        :returns: number of links transferring data
+        '''
+        ready = self.selector.select(timeout)
+        for key, events in ready:
+            link = key.data
+            # a callback earlier in the batch may have unregistered it
+            if self._links.get(link.fileobj) is not link:
+                continue
+            try:
+                if events & selectors.EVENT_READ and \
+                        not link._recv(link.rx, link.fileobj):
+                    link.eof = True
+                    link.rx.feed_eof()
+                if events & selectors.EVENT_WRITE:
+                    link._send(link.tx, link.fileobj)
+            except (BlockingIOError, InterruptedError):
+                pass
+            except OSError as exc:
+                link.error = exc
+                if link.rx is not None:
+                    link.rx.feed_eof()
+            if link.callback is not None:
+                link.callback(link)
+            # the callback may have unregistered the link
+            if self._links.get(link.fileobj) is link:
+                self._update(link)
+        return len(ready)
+
+    def close(self):
+        '''Unregister all links and close the selector, not the sockets.
+        '''
+        for fileobj in tuple(self._links):
+            self.unregister(fileobj)
+        self.selector.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
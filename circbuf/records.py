@@ -0,0 +1,215 @@
+'''Circular buffer of fixed size records, e.g. samples, processed in
+batches.
+'''
+import ctypes
+import math
+
+from . import CircBuf, ResourceManager, _Segments
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+__all__ = ('RecordCircBuf',)
+
+
+def _record(size):
+    '''Structure of size bytes, so that a :class:`memoryview` of an array
+    of it indexes and slices whole records.
+    '''
+    return type('Record', (ctypes.Structure,),
+                {'_fields_': [('data', ctypes.c_char * size)]})
+
+
+def _release(arr):
+    # an array keeps the buffer exported, it's up to its holder
+    if isinstance(arr, memoryview):
+        arr.release()
+
+
+class RecordCircBuf(CircBuf):
+    '''Circular buffer counting fixed size records rather than bytes:
+    :func:`len`, :attr:`capacity`, :meth:`produced`, :meth:`consumed` and
+    the limits of :meth:`read` and :meth:`peek` are in records, producer and
+    consumer buffers are :class:`memoryview` of records. :meth:`write` and
+    :meth:`readinto` transfer whole records and return bytes like their
+    :class:`CircBuf` counterparts. Byte oriented methods, e.g.
+    :meth:`find`, indexing and iteration, aren't supported, nor are the
+    helpers :func:`circbuf.recv`, :func:`circbuf.recv_from`,
+    :func:`circbuf.send_to`, :func:`circbuf.drain_to_fd` and
+    :func:`circbuf.fill_from_fd`, which raise :class:`ValueError`.
+
+    :param record: record size in bytes, or a :class:`numpy.dtype`, or
+        anything it accepts, which requires NumPy
+    :param count: buffer length in records, power of 2
+    :param sync: see :class:`circbuf.CircBuf`
+    '''
+
+    __slots__ = ('_record', '_dtype', '__consumer_arr', '__producer_arr')
+
+    def __init__(self, record, count=2 ** 10, *, sync='lock'):
+        if count & (count - 1):
+            raise ValueError('count must be power of 2')
+        if isinstance(record, int):
+            self._dtype = None
+            size = record
+        elif numpy is None:
+            raise RuntimeError('dtype records require numpy')
+        else:
+            self._dtype = numpy.dtype(record)
+            size = self._dtype.itemsize
+        if size < 1:
+            raise ValueError('record size must be positive')
+        self._init_sync(sync)
+        self._record = _record(size)
+        self._buf, self._mirror = self._allocate(count, False)
+        self._head = 0
+        self._tail = 0
+
+    def _allocate(self, count, mirrored):
+        return memoryview((self._record * count).from_buffer(
+            bytearray(count * self.record_size))), None
+
+    @property
+    def record_size(self):
+        ''':returns: record size in bytes
+        '''
+        return ctypes.sizeof(self._record)
+
+    @property
+    def dtype(self):
+        ''':returns: :class:`numpy.dtype` of the records, ``None`` if
+            created by size
+        '''
+        return self._dtype
+
+    def _array(self, mv):
+        mv = mv.cast('B')
+        if numpy is not None:
+            return numpy.frombuffer(
+                mv, self._dtype if self._dtype is not None else
+                numpy.dtype((numpy.uint8, self.record_size)))
+        if not len(mv):
+            # a memoryview can't be cast to a shape holding zeros
+            return mv
+        return mv.cast('B', (len(mv) // self.record_size, self.record_size))
+
+    @property
+    def producer_array(self):
+        ''':returns: producer buffer as array of records, of the dtype or
+            of ``uint8`` rows if created by size; a 2-D :class:`memoryview`
+            of bytes if NumPy is absent
+        :rtype: :class:`numpy.ndarray` or :class:`memoryview`
+        '''
+        def acquire():
+            self._producer_lock.acquire()
+            self.__producer_arr = self._array(self._producer_mv())
+            return self.__producer_arr
+
+        def release():
+            _release(self.__producer_arr)
+            del self.__producer_arr
+            self._producer_lock.release()
+
+        return ResourceManager(acquire, release)
+
+    @property
+    def consumer_array(self):
+        ''':returns: consumer buffer as array of records, see
+            :attr:`producer_array`
+        :rtype: :class:`numpy.ndarray` or :class:`memoryview`
+        '''
+        def acquire():
+            self._consumer_lock.acquire()
+            self.__consumer_arr = self._array(self._consumer_mv())
+            return self.__consumer_arr
+
+        def release():
+            _release(self.__consumer_arr)
+            del self.__consumer_arr
+            self._consumer_lock.release()
+
+        return ResourceManager(acquire, release)
+
+    def readinto(self, b):
+        '''Read whole records into a pre-allocated, writable bytes-like
+        object.
+
+        :param b: buffer to read into
+        :returns: number of bytes read
+        '''
+        size = self.record_size
+        with memoryview(b) as dst, self._consumer_lock:
+            dst = dst.cast('B')
+            first, second = self._consumer_mvs(len(dst) // size)
+            cnt = first.nbytes
+            dst[:cnt] = first.cast('B')
+            dst[cnt:cnt + second.nbytes] = second.cast('B')
+            self.consumed(len(first) + len(second))
+        return cnt + second.nbytes
+
+    def write(self, b, block=False, timeout=None):
+        '''Write whole records, see :meth:`circbuf.CircBuf.write`.
+
+        :raises ValueError: if b doesn't hold whole records
+        '''
+        with memoryview(b) as view:
+            if view.nbytes % self.record_size:
+                raise ValueError('b must hold whole records')
+        return super().write(b, block, timeout)
+
+    def write_many(self, buffers, partial=False):
+        '''Write the concatenation of buffers, see
+        :meth:`circbuf.CircBuf.write_many`; if partial, as many whole
+        records as fit.
+        '''
+        data = bytes().join(buffers)
+        size = self.record_size
+        if not partial and len(data) % size:
+            raise ValueError('buffers must hold whole records')
+        with memoryview(data) as src, self._producer_lock:
+            # checked under the same lock hold as the copy, so a concurrent
+            # producer can't take the space in between
+            if not partial and len(src) > self.space_avail * size:
+                return None
+            return self._copy(src)
+
+    def transfer_to(self, other, n=-1):
+        '''Move whole records to other, see
+        :meth:`circbuf.CircBuf.transfer_to`.
+
+        :param n: maximum number of records to move, moves all if negative
+            or ``None``
+        :returns: number of bytes moved
+        '''
+        size, other_size = self.record_size, getattr(other, 'record_size', 1)
+        with self._consumer_lock:
+            # offer only what fits, as other may take part of a record, in
+            # whole records of both
+            cnt = min(len(self), other.space_avail * other_size // size)
+            if n is not None and n >= 0:
+                cnt = min(cnt, n)
+            cnt -= cnt % (other_size // math.gcd(size, other_size))
+            with _Segments(self._consumer_mvs(cnt)) as segments:
+                written = other.write_many(segments) or 0
+            self.consumed(written // size)
+        return written
+
+    def _write(self, b):
+        with memoryview(b) as src, self._producer_lock:
+            return self._copy(src)
+
+    def _copy(self, src):
+        '''Copy the whole records of src into the producer buffer, the
+        producer lock held.
+        '''
+        size = self.record_size
+        src = src.cast('B')
+        first, second = self._producer_mvs()
+        cnt = min(len(first), len(src) // size)
+        first.cast('B')[:cnt * size] = src[:cnt * size]
+        rest = min(len(second), len(src) // size - cnt)
+        second.cast('B')[:rest * size] = src[cnt * size:(cnt + rest) * size]
+        self.produced(cnt + rest)
+        return (cnt + rest) * size or None
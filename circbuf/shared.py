@@ -0,0 +1,80 @@
+'''Circular buffer shared between processes.
+'''
+from multiprocessing import shared_memory
+
+from . import _SPSC
+from ._mapped import MappedCircBuf, HEADER
+
+
+__all__ = ('SharedCircBuf',)
+
+
+def _shared_memory(name, create, size):
+    try:
+        # prevent the resource tracker of an attaching process from
+        # unlinking the memory once it exits
+        return shared_memory.SharedMemory(name, create, size,
+                                          track=create)
+    except TypeError:
+        return shared_memory.SharedMemory(name, create, size)
+
+
+def _attach(name, sync):
+    return SharedCircBuf(name=name, create=False, sync=sync)
+
+
+class SharedCircBuf(MappedCircBuf):
+    '''Circular buffer whose data and indices live in
+    :class:`multiprocessing.shared_memory.SharedMemory`, attachable by
+    name from another process.
+
+    A single producer and a single consumer process are supported, the
+    indices are published by aligned 8-byte stores. Locks and
+    :meth:`wait_readable`/:meth:`wait_writable` synchronise threads of the
+    same process only. Buffers may be passed to other processes, e.g. as
+    :class:`multiprocessing.Process` arguments, which attach to the same
+    shared memory.
+
+    :param size: buffer length, power of 2, ignored if not create
+    :param name: shared memory name, a random one if ``None``
+    :param create: create the shared memory, attach to it if ``False``
+    :param sync: see :class:`circbuf.CircBuf`
+    '''
+
+    __slots__ = ('_shm',)
+
+    def __init__(self, size=2 ** 12, *, name=None, create=True,
+                 sync='lock'):
+        if create and size & (size - 1):
+            raise ValueError('size must be power of 2')
+        self._init_sync(sync)
+        self._shm = _shared_memory(name, create,
+                                   size + HEADER if create else 0)
+        try:
+            self._map(self._shm.buf, size if create else None)
+        except ValueError:
+            self._shm.close()
+            raise
+
+    def __reduce__(self):
+        return _attach, (self.name, 'spsc' if isinstance(self, _SPSC)
+                         else 'lock')
+
+    @property
+    def name(self):
+        ''':returns: shared memory name
+        '''
+        return self._shm.name
+
+    def close(self):
+        '''Close access to the shared memory from this instance, requires
+        all producer and consumer buffers to be released.
+        '''
+        self._unmap()
+        self._shm.close()
+
+    def unlink(self):
+        '''Request the shared memory to be destroyed, to be called once by
+        the creating process.
+        '''
+        self._shm.unlink()
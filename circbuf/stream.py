@@ -0,0 +1,89 @@
+''':mod:`io` adapters of :class:`circbuf.CircBuf`, so it may be wrapped by
+the buffered and text layers of the standard library, e.g.
+:class:`io.BufferedReader` or :class:`io.TextIOWrapper`, or passed where a
+file object is expected.
+'''
+import io
+
+
+__all__ = ('CircBufReader', 'CircBufWriter')
+
+
+class CircBufReader(io.RawIOBase):
+    '''Raw stream reading from the consumer buffer of buf, see
+    :meth:`circbuf.CircBuf.as_reader`. Reading returns ``b''`` once buf is
+    empty and its writer was closed.
+
+    :param buf: buffer to read from
+    :param block: wait for data, rather than returning ``None`` if buf is
+        empty
+    :param timeout: timeout in seconds if block, waits forever if ``None``
+    '''
+
+    def __init__(self, buf, block=True, timeout=None):
+        self.buf = buf
+        self.block = block
+        self.timeout = timeout
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        '''Read into b, at least a single byte unless at EOF.
+
+        :returns: number of bytes read, 0 at EOF, ``None`` if not block
+            and buf is empty
+        :raises TimeoutError: if timed out waiting for data
+        '''
+        self._checkClosed()
+        buf = self.buf
+        if not len(buf) and not buf._eof:
+            if not self.block:
+                return None
+            if not buf._wait(buf._readable, buf._readers,
+                             lambda: len(buf) or buf._eof, 1, self.timeout):
+                raise TimeoutError('timed out waiting for data')
+        return buf.readinto(b)
+
+
+class CircBufWriter(io.RawIOBase):
+    '''Raw stream writing to the producer buffer of buf, see
+    :meth:`circbuf.CircBuf.as_writer`. Closing it signals EOF to the
+    readers of buf.
+
+    :param buf: buffer to write to
+    :param block: wait for space until all of b is written, rather than
+        writing what fits
+    :param timeout: timeout in seconds if block, waits forever if ``None``
+    '''
+
+    def __init__(self, buf, block=True, timeout=None):
+        self.buf = buf
+        self.block = block
+        self.timeout = timeout
+        buf._eof = False
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        '''Write b.
+
+        :returns: number of bytes written, ``None`` if not block and buf
+            is full
+        :raises TimeoutError: if timed out prior writing a single byte
+        '''
+        self._checkClosed()
+        with memoryview(b) as view:
+            nbytes = view.nbytes
+        written = self.buf.write(b, self.block, self.timeout)
+        if written is None and nbytes:
+            if self.block:
+                raise TimeoutError('timed out waiting for space')
+            return None
+        return written or 0
+
+    def close(self):
+        if not self.closed:
+            self.buf.feed_eof()
+        super().close()
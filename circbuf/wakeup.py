@@ -0,0 +1,82 @@
+'''File descriptors signalling the level of a :class:`circbuf.CircBuf`, to
+be registered with :mod:`selectors` along with sockets.
+'''
+import os
+
+
+__all__ = ('WakeupFd',)
+
+
+class WakeupFd:
+    '''File descriptor readable while level is at least threshold, see
+    :meth:`circbuf.CircBuf.readable_fd` and
+    :meth:`circbuf.CircBuf.writable_fd`. Backed by :func:`os.eventfd` if
+    available, by a pipe otherwise. It's signalled once level reaches
+    threshold and reset once it drops below, each a single system call.
+
+    :param buf: buffer to signal the level of
+    :param level: function returning the level
+    :param threshold: level to signal at
+    :param rising: waiters notified as level rises
+    :param falling: waiters notified as level falls
+    '''
+
+    def __init__(self, buf, level, threshold, rising, falling):
+        if hasattr(os, 'eventfd'):
+            self._rfd = self._wfd = os.eventfd(
+                0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        else:
+            self._rfd, self._wfd = os.pipe()
+            os.set_blocking(self._rfd, False)
+            os.set_blocking(self._wfd, False)
+        self._buf, self._level, self._threshold = buf, level, threshold
+        self._signalled = False
+        # the falling waiters are notified of the complement of level, which
+        # depends on the capacity, changed by resizing; checking level on
+        # each notification is cheap, unlike a system call
+        self._waiters = ((rising, (threshold, self._set)),
+                         (falling, (0, self._reset)))
+        # waiters are woken holding the lock of the conditions, which
+        # serialises signalling and resetting
+        with buf._readable:
+            for waiters, waiter in self._waiters:
+                waiters.append(waiter)
+            self._set()
+
+    def fileno(self):
+        return self._rfd
+
+    def _set(self):
+        if not self._signalled and self._level() >= self._threshold:
+            if self._rfd == self._wfd:
+                os.eventfd_write(self._wfd, 1)
+            else:
+                os.write(self._wfd, b'\0')
+            self._signalled = True
+
+    def _reset(self):
+        if self._signalled and self._level() < self._threshold:
+            if self._rfd == self._wfd:
+                os.eventfd_read(self._rfd)
+            else:
+                os.read(self._rfd, 1)
+            self._signalled = False
+
+    def close(self):
+        '''Stop signalling and close the file descriptor.
+        '''
+        if self._rfd < 0:
+            return
+        with self._buf._readable:
+            for waiters, waiter in self._waiters:
+                waiters.remove(waiter)
+        os.close(self._rfd)
+        if self._wfd != self._rfd:
+            os.close(self._wfd)
+        self._rfd = self._wfd = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
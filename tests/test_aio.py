@@ -0,0 +1,215 @@
+from nose import tools
+from unittest import mock
+import asyncio
+import socket
+import threading
+import circbuf
+from circbuf import aio, pump
+
+
+def _run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_readexactly():
+    buf = circbuf.CircBuf(16)
+    dut = aio.AsyncCircBuf(buf)
+
+    async def test():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, buf.write, bytes(range(4)))
+        tools.eq_(await dut.readexactly(2), bytes(range(2)))
+        loop.call_later(0.01, buf.write, bytes(range(4, 8)))
+        tools.eq_(await dut.readexactly(6), bytes(range(2, 8)))
+
+    _run(test())
+
+
+def test_readexactly_exceeding_buffer():
+    buf = circbuf.CircBuf(16)
+    dut = aio.AsyncCircBuf(buf)
+    data = bytes(range(64))
+
+    def produce():
+        buf.write(data, block=True, timeout=10)
+
+    async def test():
+        thread = threading.Thread(target=produce)
+        thread.start()
+        tools.eq_(await dut.readexactly(len(data)), data)
+        thread.join()
+
+    _run(test())
+
+
+def test_readexactly_raises_at_eof():
+    buf = circbuf.CircBuf(16)
+    dut = aio.AsyncCircBuf(buf)
+    buf.write(bytes(2))
+
+    async def test():
+        asyncio.get_running_loop().call_later(0.01, dut.feed_eof)
+        with tools.assert_raises(asyncio.IncompleteReadError) as cm:
+            await dut.readexactly(4)
+        tools.eq_(cm.exception.partial, bytes(2))
+        tools.ok_(dut.at_eof())
+
+    _run(test())
+
+
+def test_read_until():
+    buf = circbuf.CircBuf(16)
+    dut = aio.AsyncCircBuf(buf)
+
+    async def test():
+        loop = asyncio.get_running_loop()
+        buf.write(b'ab')
+        loop.call_later(0.01, buf.write, b'c\nd')
+        tools.eq_(await dut.read_until(b'\n'), b'abc\n')
+        tools.eq_(buf._readers, [])
+        loop.call_later(0.01, dut.feed_eof)
+        with tools.assert_raises(asyncio.IncompleteReadError):
+            await dut.read_until(b'\n')
+
+    _run(test())
+
+
+def test_eof_fed_to_buffer():
+    buf = circbuf.CircBuf(16)
+    dut = aio.AsyncCircBuf(buf)
+    a, b = socket.socketpair()
+    a.setblocking(False)
+
+    async def test():
+        loop = asyncio.get_running_loop()
+        with pump.Pump() as p:
+            link = p.register(a, buf)
+            b.send(b'ab')
+            b.close()
+
+            def poll():
+                while not link.eof:
+                    p.poll(1)
+            loop.run_in_executor(None, poll)
+            with tools.assert_raises(asyncio.IncompleteReadError) as cm:
+                await asyncio.wait_for(dut.read_until(b'\n'), 5)
+        tools.eq_(cm.exception.partial, b'ab')
+        tools.ok_(dut.at_eof())
+
+        writer = buf.as_writer()
+        loop.call_later(0.01, writer.close)
+        tools.eq_(await asyncio.wait_for(dut.read(), 5), b'')
+
+    with a, b:
+        _run(test())
+
+
+def test_drain():
+    buf = circbuf.CircBuf(16)
+    dut = aio.AsyncCircBuf(buf)
+
+    async def test():
+        dut.write(bytes(8))
+        asyncio.get_running_loop().call_later(0.01, buf.read)
+        await dut.drain()
+        tools.eq_(len(buf), 0)
+
+    _run(test())
+
+
+def test_protocol_receives_into_buf():
+    buf = circbuf.CircBuf(16)
+    a, b = socket.socketpair()
+
+    async def test():
+        loop = asyncio.get_running_loop()
+        protocol = aio.CircBufProtocol(buf)
+        transport, _ = await loop.connect_accepted_socket(
+            lambda: protocol, b)
+        data = bytes(range(40))
+        loop.run_in_executor(None, a.sendall, data)
+        tools.eq_(await protocol.reader.readexactly(len(data)), data)
+        a.close()
+        tools.eq_(await protocol.reader.read(), bytes())
+        tools.ok_(protocol.reader.at_eof())
+        transport.close()
+
+    with a, b:
+        _run(test())
+
+
+def _paused_protocol(buf, data):
+    transport = mock.Mock()
+    transport.is_closing.return_value = False
+    dut = aio.CircBufProtocol(buf)
+    dut.connection_made(transport)
+    _receive(dut, data)
+    tools.eq_(transport.pause_reading.call_count, 1)
+    return dut
+
+
+def _receive(dut, data):
+    mv = dut.get_buffer(-1)
+    mv[:len(data)] = data
+    dut.buffer_updated(len(data))
+
+
+def test_protocol_readexactly_above_low_water():
+    buf = circbuf.CircBuf(256)
+    data = bytes(range(200))
+
+    async def test():
+        dut = _paused_protocol(buf, data[:192])
+        tools.eq_(await dut.reader.readexactly(100), data[:100])
+        # as a transport, receive only once resumed
+        dut.transport.resume_reading.side_effect = lambda: \
+            asyncio.get_running_loop().call_soon(_receive, dut, data[192:])
+        tools.eq_(await asyncio.wait_for(dut.reader.readexactly(100), 5),
+                  data[100:])
+        tools.eq_(dut.transport.resume_reading.call_count, 1)
+
+    _run(test())
+
+
+def test_protocol_read_until_raises_above_high_water():
+    buf = circbuf.CircBuf(256)
+
+    async def test():
+        dut = _paused_protocol(buf, bytes(192))
+        with tools.assert_raises(ValueError):
+            await asyncio.wait_for(dut.reader.read_until(b'\n'), 5)
+
+    _run(test())
+
+
+def test_protocol_pauses_and_resumes_reading():
+    buf = circbuf.CircBuf(16)
+    transport = mock.Mock()
+    transport.is_closing.return_value = False
+
+    async def test():
+        dut = aio.CircBufProtocol(buf, high_water=8, low_water=2)
+        dut.connection_made(transport)
+        mv = dut.get_buffer(-1)
+        mv[:8] = bytes(8)
+        dut.buffer_updated(8)
+        tools.eq_(transport.pause_reading.call_count, 1)
+        tools.eq_(len(buf._writers), 1)
+        buf.read(5)
+        await asyncio.sleep(0)
+        tools.eq_(transport.resume_reading.call_count, 0)
+        buf.read(1)
+        await asyncio.sleep(0)
+        tools.eq_(transport.resume_reading.call_count, 1)
+        tools.eq_(buf._writers, [])
+
+    _run(test())
+
+
+@tools.raises(ValueError)
+def test_protocol_raises_if_watermarks_invalid():
+    aio.CircBufProtocol(circbuf.CircBuf(16), high_water=16)
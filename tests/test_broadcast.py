@@ -0,0 +1,173 @@
+from nose import tools
+from unittest import mock
+import threading
+import circbuf
+from circbuf import broadcast, framing
+
+
+def test_each_reader_consumes():
+    dut = broadcast.BroadcastCircBuf(16)
+    first, second = dut.reader(), dut.reader()
+
+    tools.eq_(dut.write(b'abcdef'), 6)
+    tools.ok_(isinstance(first, circbuf.CircBuf))
+    tools.eq_(first.read(4), b'abcd')
+    tools.eq_(len(first), 2)
+    tools.eq_(len(second), 6)
+    tools.eq_(len(dut), 6)
+    tools.eq_(second.read(), b'abcdef')
+    tools.eq_(len(dut), 2)
+    tools.eq_(dut.readers, (first, second))
+
+
+def test_space_bounded_by_slowest_reader():
+    dut = broadcast.BroadcastCircBuf(16)
+    fast, slow = dut.reader(), dut.reader()
+
+    dut.write(bytes(10))
+    fast.read()
+    tools.eq_(dut.space_avail, 5)
+    tools.eq_(dut.write(bytes(10)), 5)
+    slow.read(8)
+    tools.eq_(dut.space_avail, 8)
+    with fast.consumer_bufs as (head, tail):
+        tools.eq_(len(head) + len(tail), 5)
+
+
+def test_no_readers_drops():
+    dut = broadcast.BroadcastCircBuf(16)
+
+    tools.eq_(dut.write(bytes(10)), 10)
+    tools.eq_(len(dut), 0)
+    reader = dut.reader()
+    dut.write(b'ab')
+    tools.eq_(reader.read(), b'ab')
+
+
+def test_reader_supports_framing():
+    dut = broadcast.BroadcastCircBuf(16)
+    reader = dut.reader()
+    dut.write(b'ab\ncd\n')
+
+    tools.eq_(framing.readline(reader), b'ab\n')
+    tools.eq_(reader.find(b'd'), 1)
+
+
+def test_close_unregisters():
+    dut = broadcast.BroadcastCircBuf(16)
+    reader = dut.reader()
+    dut.write(bytes(15))
+
+    reader.close()
+    tools.ok_(reader.detached)
+    tools.eq_(len(reader), 0)
+    tools.eq_(dut.space_avail, 15)
+
+
+def test_close_waits_for_producer_lock():
+    dut = broadcast.BroadcastCircBuf(16)
+    reader = dut.reader()
+    thread = threading.Thread(target=reader.close)
+
+    with dut.producer_buf:
+        thread.start()
+        thread.join(.05)
+        tools.ok_(not reader.detached)
+    thread.join(1)
+    tools.ok_(reader.detached)
+    tools.eq_(dut.readers, ())
+
+
+def test_slow_detach():
+    dut = broadcast.BroadcastCircBuf(16, slow='detach', max_lag=8)
+    fast, slow = dut.reader(), dut.reader()
+    dut.write(bytes(8))
+    fast.read()
+
+    tools.eq_(dut.write(b'abcd'), 4)
+    tools.ok_(slow.detached)
+    tools.eq_(dut.readers, (fast,))
+    tools.eq_(fast.read(), b'abcd')
+
+
+def test_slow_skip():
+    dut = broadcast.BroadcastCircBuf(16, slow='skip')
+    reader = dut.reader()
+    dut.write(bytes(15))
+
+    tools.eq_(dut.write(b'ab'), 2)
+    tools.eq_(reader.dropped, 15)
+    tools.eq_(reader.read(), b'ab')
+
+
+def test_slow_released_under_producer_lock():
+    dut = broadcast.BroadcastCircBuf(16, slow='skip')
+    reader = dut.reader()
+    release_slow = broadcast.BroadcastCircBuf._release_slow
+    locked = []
+
+    def check(self):
+        locked.append(self._producer_lock.locked())
+        release_slow(self)
+    with mock.patch.object(broadcast.BroadcastCircBuf, '_release_slow',
+                           check):
+        dut.write(bytes(15))
+        dut.write_many((b'a', b'b'))
+
+    tools.ok_(locked and all(locked))
+    tools.eq_(reader.read(), b'ab')
+
+
+def test_slow_skip_waits_for_consumer_buf():
+    dut = broadcast.BroadcastCircBuf(16, slow='skip')
+    reader = dut.reader()
+    dut.write(bytes(15))
+
+    with reader.consumer_buf as mv:
+        tools.eq_(dut.write(b'ab'), None)
+        tools.eq_(len(mv), 15)
+    tools.eq_(dut.write(b'ab'), 2)
+
+
+def test_wait_readable_by_reader():
+    dut = broadcast.BroadcastCircBuf(16)
+    reader = dut.reader()
+    thread = threading.Thread(target=dut.write, args=(b'abc',))
+    thread.start()
+
+    tools.eq_(reader.read(3, block=True, timeout=1), b'abc')
+    thread.join()
+
+
+def test_blocking_write_waits_for_readers():
+    dut = broadcast.BroadcastCircBuf(16)
+    readers = [dut.reader() for _ in range(3)]
+    data = bytes(range(64))
+    received = [[] for _ in readers]
+
+    def consume(reader, chunks):
+        while sum(map(len, chunks)) < len(data):
+            chunks.append(reader.read(8, block=True, timeout=1))
+
+    threads = [threading.Thread(target=consume, args=args)
+               for args in zip(readers, received)]
+    for thread in threads:
+        thread.start()
+    tools.eq_(dut.write(data, block=True, timeout=1), len(data))
+    for thread in threads:
+        thread.join()
+    for chunks in received:
+        tools.eq_(bytes().join(chunks), data)
+
+
+@tools.raises(RuntimeError)
+def test_consumed_raises():
+    dut = broadcast.BroadcastCircBuf(16)
+    dut.reader()
+    dut.write(b'a')
+    dut.read()
+
+
+@tools.raises(ValueError)
+def test_init_raises_if_skip_and_spsc():
+    broadcast.BroadcastCircBuf(16, sync='spsc', slow='skip')
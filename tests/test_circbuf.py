@@ -1,4 +1,4 @@
-from nose import tools
+from nose import SkipTest, tools
 import sys
 IS_PY32 = sys.version_info < (3, 3)
 if IS_PY32:
@@ -8,9 +8,42 @@ else:
     from unittest import mock
     from collections.abc import Iterable
 import functools
+import itertools
+import mmap
+import os
+import selectors
+import socket
+import threading
+import time
 import circbuf
 
 
+def _factories(size=16):
+    '''Yield a factory of each backend, creating buffers at least size long.
+    '''
+    yield functools.partial(circbuf.CircBuf, size)
+    if circbuf._mirror.SUPPORTED:
+        yield functools.partial(circbuf.CircBuf, max(size, mmap.PAGESIZE),
+                                mirrored=True)
+
+
+def _backends(size=16):
+    return (factory() for factory in _factories(size))
+
+
+def _positions(capacity):
+    '''Every position of small buffers, the positions around the ends and
+    the middle of big ones.
+    '''
+    if capacity <= 16:
+        return range(capacity)
+    return sorted({0, 1, 2, capacity // 2, capacity - 2, capacity - 1})
+
+
+def _data(cnt):
+    return bytes(itertools.islice(itertools.cycle(range(1, 256)), cnt))
+
+
 def test_resource_manger_acquire_release():
     acquire = mock.Mock(return_value=42)
     release = mock.Mock()
@@ -76,25 +109,29 @@ def test_consumed_requires_lock():
 
 
 def test_cnt_to_end_space_to_end():
-    dut = circbuf.CircBuf(16)
+    for dut in _backends(16):
 
-    def produce(n):
-        with dut.producer_buf:
-            dut.produced(n)
+        def produce(n):
+            with dut.producer_buf:
+                dut.produced(n)
 
-    def consume(n):
-        with dut.consumer_buf:
-            dut.consumed(n)
+        def consume(n):
+            with dut.consumer_buf:
+                dut.consumed(n)
 
-    tools.eq_((dut.cnt_to_end, dut.space_to_end), (0, dut.capacity - 1))
-    produce(dut.capacity - 1)
-    tools.eq_((dut.cnt_to_end, dut.space_to_end), (dut.capacity - 1, 0))
-    consume(dut.capacity - 1)
-    tools.eq_((dut.cnt_to_end, dut.space_to_end), (0, 1))
-    produce(1)
-    tools.eq_((dut.cnt_to_end, dut.space_to_end), (1, dut.capacity - 2))
-    consume(1)
-    tools.eq_((dut.cnt_to_end, dut.space_to_end), (0, dut.capacity - 1))
+        tools.eq_((dut.cnt_to_end, dut.space_to_end),
+                  (0, dut.capacity - 1))
+        produce(dut.capacity - 1)
+        tools.eq_((dut.cnt_to_end, dut.space_to_end),
+                  (dut.capacity - 1, 0))
+        consume(dut.capacity - 1)
+        tools.eq_((dut.cnt_to_end, dut.space_to_end), (0, 1))
+        produce(1)
+        tools.eq_((dut.cnt_to_end, dut.space_to_end),
+                  (1, dut.capacity - 2))
+        consume(1)
+        tools.eq_((dut.cnt_to_end, dut.space_to_end),
+                  (0, dut.capacity - 1))
 
 
 def test_iterator():
@@ -139,6 +176,46 @@ def test_iterator_wrap_around():
     tools.eq_(len(dut), 15, 'shall wrap around')
 
 
+def test_iterator_drains_across_wrap():
+    for buf, data in _wrap_combinations(16):
+        tools.eq_(bytes(buf), data)
+        tools.eq_(len(buf), 0)
+
+
+def test_iter_chunks():
+    for buf, data in _wrap_combinations(16):
+        chunks = []
+        for chunk in buf.iter_chunks():
+            tools.ok_(isinstance(chunk, memoryview))
+            chunks.append(bytes(chunk))
+        tools.eq_(bytes().join(chunks), data)
+        tools.ok_(len(chunks) <= 2)
+        tools.eq_(len(buf), 0)
+
+
+def test_iter_chunks_max_size_copy():
+    for buf, data in _wrap_combinations(16):
+        chunks = list(buf.iter_chunks(4, copy=True))
+        tools.ok_(all(isinstance(chunk, bytes) and 0 < len(chunk) <= 4
+                      for chunk in chunks))
+        tools.eq_(bytes().join(chunks), data)
+
+
+def test_iter_chunks_consumes_on_advance():
+    dut = circbuf.CircBuf(16)
+    dut.write(_data(10))
+    chunks = dut.iter_chunks(4)
+
+    chunk = next(chunks)
+    tools.eq_(len(dut), 10)
+    next(chunks)
+    tools.eq_(len(dut), 6)
+    tools.assert_raises(ValueError, len, chunk)
+    chunks.close()
+    tools.eq_(len(dut), 6)
+    tools.ok_(not dut._consumer_lock.locked())
+
+
 def test_space_avail():
     buf = circbuf.CircBuf(16)
     dut = lambda: buf.space_avail
@@ -179,13 +256,64 @@ def test_released_consumer_buf():
 
 
 def test_write():
-    buf = circbuf.CircBuf(16)
-    dut = buf.write
+    for buf in _backends(16):
+        dut = buf.write
+
+        nbytes = dut(bytes.fromhex('001122'))
+        tools.eq_((nbytes, bytes(buf)), (3, bytes.fromhex('001122')))
+        tools.eq_(dut(bytes()), None)
+        tools.eq_(*(buf.space_avail, dut(bytes(buf.capacity + 100))))
+
+
+def test_write_many():
+    for factory in _factories():
+        for tail in _positions(factory().capacity):
+            for cnt in _positions(factory().capacity):
+                buf = factory()
+                _advance(buf, tail)
+                data = _data(cnt)
+                pieces = (data[:cnt // 3], b'', data[cnt // 3:cnt // 2],
+                          bytearray(data[cnt // 2:]))
+                tools.eq_(buf.write_many(pieces) or 0, cnt)
+                tools.eq_(buf.read(), data)
+
+
+def test_write_many_all_or_nothing():
+    dut = circbuf.CircBuf(16)
+    dut.write(_data(6))
+
+    tools.eq_(dut.write_many((_data(5), _data(5))), None)
+    tools.eq_(len(dut), 6)
+    tools.eq_(dut.writelines((_data(4), _data(5))), 9)
+    tools.eq_(dut.read(), _data(6) + _data(4) + _data(5))
+
+
+def test_write_many_partial():
+    dut = circbuf.CircBuf(16)
+    _advance(dut, 12)
+    dut.write(_data(6))
+
+    tools.eq_(dut.write_many((_data(5), _data(5)), partial=True), 9)
+    tools.eq_(dut.read(), _data(6) + _data(5) + _data(4))
+    tools.eq_(dut.write_many(()), None)
+
+
+def test_write_many_acquires_producer_lock_once():
+    dut = circbuf.CircBuf(16)
+    lock = mock.MagicMock(wraps=dut._producer_lock)
+    lock.locked.return_value = True
+    dut._producer_lock = lock
 
-    nbytes = dut(bytes.fromhex('001122'))
-    tools.eq_((nbytes, bytes(buf)), (3, bytes.fromhex('001122')))
-    tools.eq_(dut(bytes()), None)
-    tools.eq_(*(buf.space_avail, dut(bytes(100))))
+    dut.write_many((b'ab', b'cd', b'ef'))
+    tools.eq_(lock.__enter__.call_count, 1)
+
+
+def test_write_big():
+    dut = circbuf.CircBuf(2 ** 20)
+    _advance(dut, 2 ** 19)
+
+    tools.eq_(dut.write(_data(2 ** 20)), 2 ** 20 - 1)
+    tools.eq_(dut.read(), _data(2 ** 20 - 1))
 
 
 def test_recv_is_exported():
@@ -223,3 +351,832 @@ def test_seek_to_pattern():
     tools.eq_(dut(bytes.fromhex('2a 01')), 1)
     tools.eq_(tuple(buf), (2,))
     tools.eq_(dut(42), 0)
+
+
+def _advance(buf, n):
+    with buf.producer_buf:
+        buf.produced(n)
+    with buf.consumer_buf:
+        buf.consumed(n)
+
+
+def _wrap_combinations(capacity):
+    for factory in _factories(capacity):
+        positions = _positions(factory().capacity)
+        for tail in positions:
+            for cnt in positions:
+                buf = factory()
+                _advance(buf, tail)
+                data = _data(cnt)
+                tools.eq_(buf.write(data) or 0, cnt)
+                yield buf, data
+
+
+def test_read():
+    for buf, data in _wrap_combinations(16):
+        tools.eq_(buf.read(), data)
+        tools.eq_(len(buf), 0)
+
+
+def test_read_n():
+    for buf, data in _wrap_combinations(16):
+        n = len(data) // 2
+        tools.eq_(buf.read(n), data[:n])
+        tools.eq_(buf.read(None), data[n:])
+        tools.eq_(buf.read(1), bytes())
+
+
+def test_readinto():
+    for buf, data in _wrap_combinations(16):
+        dst = bytearray(len(data) + 1)
+        tools.eq_(buf.readinto(dst), len(data))
+        tools.eq_(bytes(dst[:len(data)]), data)
+        tools.eq_(len(buf), 0)
+
+
+def test_readinto_partial():
+    for buf, data in _wrap_combinations(16):
+        n = len(data) // 2
+        dst = bytearray(n)
+        tools.eq_(buf.readinto(dst), n)
+        tools.eq_(bytes(dst), data[:n])
+        tools.eq_(len(buf), len(data) - n)
+
+
+def test_read1():
+    for buf, data in _wrap_combinations(16):
+        with buf.consumer_buf as mv:
+            cnt = len(mv)
+        tools.eq_(buf.read1(), data[:cnt])
+        tools.eq_(buf.read1(), data[cnt:])
+
+
+@tools.raises(RuntimeError)
+def test_read_releases_lock():
+    buf = circbuf.CircBuf(16)
+    buf.write(bytes(4))
+
+    buf.read(2)
+    buf.consumed(1)
+
+
+def test_producer_bufs():
+    for buf in _backends(16):
+        for tail in _positions(buf.capacity):
+            _advance(buf, tail)
+            data = _data(buf.space_avail)
+
+            with buf.producer_bufs as (first, second):
+                tools.eq_(len(first) + len(second), buf.space_avail)
+                first[:] = data[:len(first)]
+                second[:] = data[len(first):]
+                buf.produced(len(data))
+            tools.eq_(buf.read(), data)
+
+
+def test_consumer_bufs():
+    for buf, data in _wrap_combinations(16):
+        with buf.consumer_bufs as (first, second):
+            tools.eq_(bytes(first) + bytes(second), data)
+            buf.consumed(len(data))
+        tools.eq_(len(buf), 0)
+
+
+@tools.raises(ValueError)
+def test_released_consumer_bufs():
+    buf = circbuf.CircBuf(16)
+    _advance(buf, 12)
+    buf.write(bytes(8))
+    dut = None
+
+    with buf.consumer_bufs as mvs:
+        dut = mvs
+    dut[1][0]
+
+
+@tools.raises(ValueError)
+def test_produced_raises_if_bigger_than_space_avail():
+    buf = circbuf.CircBuf(16)
+
+    with buf.producer_bufs:
+        buf.produced(16)
+
+
+def test_send_to_recv_from_are_exported():
+    tools.ok_('send_to' in circbuf.__all__)
+    tools.ok_('recv_from' in circbuf.__all__)
+
+
+def test_send_to_recv_from():
+    src, dst = circbuf.CircBuf(16), circbuf.CircBuf(16)
+    _advance(src, 12)
+    _advance(dst, 8)
+    src.write(bytes(range(1, 11)))
+    a, b = socket.socketpair()
+
+    with a, b:
+        tools.eq_(circbuf.send_to(src, a), 10)
+        tools.eq_(len(src), 0)
+        tools.eq_(circbuf.recv_from(dst, b), 10)
+    tools.eq_(dst.read(), bytes(range(1, 11)))
+
+
+def test_drain_to_fd_fill_from_fd_are_exported():
+    tools.ok_('drain_to_fd' in circbuf.__all__)
+    tools.ok_('fill_from_fd' in circbuf.__all__)
+
+
+def test_drain_to_fd_fill_from_fd():
+    src, dst = circbuf.CircBuf(16), circbuf.CircBuf(16)
+    _advance(src, 12)
+    _advance(dst, 8)
+    src.write(_data(10))
+    rx, tx = os.pipe()
+
+    try:
+        tools.eq_(circbuf.drain_to_fd(src, tx, 6), 6)
+        tools.eq_(circbuf.drain_to_fd(src, tx), 4)
+        tools.eq_(circbuf.drain_to_fd(src, tx), 0)
+        tools.eq_(circbuf.fill_from_fd(dst, rx, 9), 9)
+        tools.eq_(circbuf.fill_from_fd(dst, rx), 1)
+    finally:
+        os.close(rx)
+        os.close(tx)
+    tools.eq_(dst.read(), _data(10))
+
+
+def test_fill_from_fd_eof():
+    rx, tx = os.pipe()
+    os.close(tx)
+    with open(rx, 'rb', buffering=0):
+        tools.eq_(circbuf.fill_from_fd(circbuf.CircBuf(16), rx), 0)
+
+
+def test_transfer_to():
+    for pos in _positions(16):
+        for src, data in _wrap_combinations(16):
+            dst = circbuf.CircBuf(16)
+            _advance(dst, pos)
+            dst.write(_data(4))
+            moved = min(len(data), 11)
+
+            tools.eq_(src.transfer_to(dst), moved)
+            tools.eq_(dst.read(), _data(4) + data[:moved])
+            tools.eq_(src.read(), data[moved:])
+
+
+def test_transfer_to_n():
+    src, dst = circbuf.CircBuf(16), circbuf.CircBuf(16)
+    src.write(_data(10))
+
+    tools.eq_(src.transfer_to(dst, 4), 4)
+    tools.eq_(src.transfer_to(dst, None), 6)
+    tools.eq_(src.transfer_to(dst), 0)
+    tools.eq_(dst.read(), _data(10))
+
+
+def _require_mirror():
+    if not circbuf._mirror.SUPPORTED:
+        raise SkipTest('mirrored buffers are not supported')
+
+
+def test_mirrored_buffers_do_not_wrap():
+    _require_mirror()
+    buf = circbuf.CircBuf(mmap.PAGESIZE, mirrored=True)
+    _advance(buf, buf.capacity - 2)
+
+    with buf.producer_buf as mv:
+        tools.eq_(len(mv), buf.capacity - 1)
+        mv[:] = _data(len(mv))
+        buf.produced(len(mv))
+    with buf.consumer_buf as mv:
+        tools.eq_(bytes(mv), _data(buf.capacity - 1))
+    tools.eq_(buf.cnt_to_end, 2)
+
+
+@tools.raises(ValueError)
+def test_mirrored_raises_if_not_multiple_of_page_size():
+    _require_mirror()
+    circbuf.CircBuf(mmap.PAGESIZE // 2, mirrored=True)
+
+
+def test_seek_to_pattern_wrap_around():
+    pattern = bytes.fromhex('aa bb cc')
+    for factory in _factories(16):
+        capacity = factory().capacity
+        for tail in _positions(capacity):
+            for pos in _positions(capacity - len(pattern) - 1):
+                buf = factory()
+                _advance(buf, tail)
+                buf.write(bytes(pos) + pattern + bytes((1,)))
+
+                tools.eq_(circbuf.seek_to_pattern(buf, pattern), 1)
+                tools.eq_(buf.read(), bytes((1,)))
+
+
+def test_seek_to_pattern_overlapping_prefix():
+    buf = circbuf.CircBuf(16)
+    dut = functools.partial(circbuf.seek_to_pattern, buf)
+
+    buf.write(b'aab')
+    tools.eq_(dut(b'ab'), 0)
+    buf.write(b'abababac!')
+    tools.eq_(dut(b'abac'), 1)
+    tools.eq_(buf.read(), b'!')
+
+
+def test_seek_to_pattern_keeps_partial_pattern():
+    buf = circbuf.CircBuf(16)
+    dut = functools.partial(circbuf.seek_to_pattern, buf)
+
+    buf.write(b'xyzab')
+    tools.eq_(dut(b'abc'), 2)
+    buf.write(b'c!')
+    tools.eq_(dut(b'abc'), 1)
+    buf.write(b'xyz')
+    tools.eq_(dut(b'abc'), 0)
+
+
+def test_peek():
+    for buf, data in _wrap_combinations(16):
+        tools.eq_(buf.peek(), data)
+        tools.eq_(buf.peek(3), data[:3])
+        tools.eq_(len(buf), len(data))
+
+
+def test_find():
+    for buf, data in _wrap_combinations(16):
+        for sub in (data[-3:], data[:2], data[-1:]):
+            if sub:
+                tools.eq_(buf.find(sub), data.find(sub))
+                tools.eq_(buf.find(sub, 1), data.find(sub, 1))
+                tools.eq_(buf.find(sub, -2), data.find(sub, -2))
+                tools.eq_(buf.find(sub, 0, -1), data.find(sub, 0, -1))
+        tools.eq_(buf.find(0), -1)
+        tools.eq_(len(buf), len(data))
+
+
+def test_find_empty():
+    for buf, data in _wrap_combinations(16):
+        for start in range(-len(data) - 2, len(data) + 3):
+            for end in (None, -1, 0, 2, len(data) + 1):
+                tools.eq_(buf.find(b'', start, end),
+                          data.find(b'', start, end))
+
+
+def test_getitem():
+    for buf, data in _wrap_combinations(16):
+        tools.eq_(tuple(buf[i] for i in range(len(data))), tuple(data))
+        if data:
+            tools.eq_(buf[-1], data[-1])
+        for key in (slice(None), slice(2, -2), slice(1, None, 3),
+                    slice(None, None, -1), slice(-2, 3, -2),
+                    slice(5, 1)):
+            tools.eq_(buf[key], data[key])
+        tools.eq_(len(buf), len(data))
+
+
+@tools.raises(IndexError)
+def test_getitem_raises_if_out_of_range():
+    buf = circbuf.CircBuf(16)
+    buf.write(bytes(4))
+
+    buf[4]
+
+
+def test_skip():
+    for buf, data in _wrap_combinations(16):
+        tools.eq_(buf.skip(2), min(2, len(data)))
+        tools.eq_(buf.peek(), data[2:])
+        tools.eq_(buf.skip(buf.capacity), max(len(data) - 2, 0))
+        tools.eq_(len(buf), 0)
+
+
+def test_peek_while_holding_consumer_buf():
+    buf = circbuf.CircBuf(16)
+    buf.write(bytes.fromhex('02 aa bb cc'))
+
+    with buf.consumer_buf:
+        length = buf[0]
+        tools.eq_(buf.peek(1 + length), bytes.fromhex('02 aa bb'))
+        buf.consumed(1 + length)
+    tools.eq_(buf.read(), bytes.fromhex('cc'))
+
+
+def _transfer(buf, data, chunk=1000):
+    '''Write data from this thread, read it from another thread.
+    '''
+    received = bytearray()
+
+    def consume():
+        while len(received) < len(data):
+            result = buf.read()
+            if result:
+                received.extend(result)
+            else:
+                time.sleep(0)
+
+    thread = threading.Thread(target=consume)
+    thread.start()
+    view, written = memoryview(data), 0
+    while written < len(data):
+        result = buf.write(view[written:written + chunk])
+        if result:
+            written += result
+        else:
+            time.sleep(0)
+    thread.join()
+    return bytes(received)
+
+
+def test_spsc():
+    dut = circbuf.CircBuf(16, sync='spsc')
+
+    tools.ok_(isinstance(dut, circbuf.CircBuf))
+    dut.produced(4)
+    with dut.producer_buf as mv:
+        mv[:] = _data(len(mv))
+        dut.produced(len(mv))
+    with dut.consumer_bufs as (first, second):
+        tools.eq_(bytes(first) + bytes(second), bytes(4) + _data(11))
+    dut.consumed(15)
+    tools.eq_(len(dut), 0)
+
+
+@tools.raises(ValueError)
+def test_spsc_produced_raises_if_bigger_than_space_avail():
+    circbuf.CircBuf(16, sync='spsc').produced(16)
+
+
+@tools.raises(ValueError)
+def test_init_raises_if_unknown_sync():
+    circbuf.CircBuf(16, sync='none')
+
+
+def test_spsc_stress():
+    data = _data(2 ** 18)
+    for sync in ('lock', 'spsc'):
+        tools.eq_(_transfer(circbuf.CircBuf(2 ** 12, sync=sync), data), data)
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+def test_wait_readable_times_out():
+    buf = circbuf.CircBuf(16)
+    buf.write(bytes(2))
+
+    tools.eq_(buf.wait_readable(2, 0), True)
+    tools.eq_(buf.wait_readable(3, 0.01), False)
+    tools.eq_(buf._readers, [])
+
+
+def test_wait_writable_times_out():
+    buf = circbuf.CircBuf(16)
+    buf.write(bytes(14))
+
+    tools.eq_(buf.wait_writable(1, 0), True)
+    tools.eq_(buf.wait_writable(2, 0.01), False)
+    tools.eq_(buf._writers, [])
+
+
+def _selected(fd):
+    with selectors.DefaultSelector() as sel:
+        sel.register(fd, selectors.EVENT_READ)
+        return bool(sel.select(0))
+
+
+def test_readable_fd():
+    buf = circbuf.CircBuf(16)
+
+    with buf.readable_fd(2) as fd:
+        tools.ok_(not _selected(fd))
+        buf.write(bytes(1))
+        tools.ok_(not _selected(fd))
+        buf.write(bytes(1))
+        tools.ok_(_selected(fd))
+        buf.write(bytes(1))
+        buf.read(1)
+        tools.ok_(_selected(fd))
+        buf.read(1)
+        tools.ok_(not _selected(fd))
+    tools.eq_((buf._readers, buf._writers), ([], []))
+
+
+def test_writable_fd():
+    buf = circbuf.CircBuf(16)
+    buf.write(bytes(15))
+
+    with buf.writable_fd(4) as fd:
+        tools.ok_(not _selected(fd))
+        buf.read(3)
+        tools.ok_(not _selected(fd))
+        buf.read(1)
+        tools.ok_(_selected(fd))
+        buf.write(bytes(1))
+        tools.ok_(not _selected(fd))
+
+
+def test_readable_fd_coalesces():
+    buf = circbuf.CircBuf(16)
+
+    with buf.readable_fd(), \
+            mock.patch('os.eventfd_write') as eventfd_write, \
+            mock.patch('os.write') as write:
+        for _ in range(3):
+            buf.write(bytes(1))
+        tools.eq_(eventfd_write.call_count + write.call_count, 1)
+
+
+def test_readable_fd_after_resize():
+    for size in (16, 64):
+        buf = circbuf.CircBuf(32)
+
+        with buf.readable_fd() as readable, buf.writable_fd(8) as writable:
+            buf.resize(size)
+            buf.write(bytes(1))
+            tools.ok_(_selected(readable))
+            buf.read(1)
+            tools.ok_(not _selected(readable))
+            buf.write(bytes(size - 1 - 8))
+            tools.ok_(_selected(writable))
+            buf.write(bytes(1))
+            tools.ok_(not _selected(writable))
+
+
+def test_readable_fd_pipe():
+    buf = circbuf.CircBuf(16)
+
+    with mock.patch.object(circbuf.wakeup, 'os', mock.Mock(
+            wraps=os, spec=[n for n in dir(os) if n != 'eventfd'])):
+        fd = buf.readable_fd()
+    with fd:
+        tools.ok_(fd._rfd != fd._wfd)
+        buf.write(b'a')
+        tools.ok_(_selected(fd))
+        buf.read()
+        tools.ok_(not _selected(fd))
+
+
+@tools.raises(ValueError)
+def test_readable_fd_raises_if_bigger_than_buffer():
+    circbuf.CircBuf(16).readable_fd(16)
+
+
+@tools.raises(ValueError)
+def test_wait_readable_raises_if_bigger_than_buffer():
+    circbuf.CircBuf(16).wait_readable(16)
+
+
+def test_wait_readable_wakes_up_on_threshold():
+    for sync in ('lock', 'spsc'):
+        buf = circbuf.CircBuf(16, sync=sync)
+        result = []
+        thread = _start(lambda: result.append(buf.wait_readable(4, 10)))
+
+        buf.write(bytes(2))
+        buf.write(bytes(2))
+        thread.join()
+        tools.eq_(result, [True])
+        tools.eq_(buf._readers, [])
+
+
+def test_waiters_woken_if_threshold_crossed():
+    buf = circbuf.CircBuf(16)
+    readable, writable = mock.Mock(), mock.Mock()
+    buf._readers.append((4, readable))
+    buf._writers.append((14, writable))
+
+    buf.write(bytes(2))
+    tools.eq_(readable.call_count, 0)
+    buf.write(bytes(2))
+    tools.eq_(readable.call_count, 1)
+    buf.read(2)
+    tools.eq_(writable.call_count, 0)
+    buf.read(1)
+    tools.eq_(writable.call_count, 1)
+
+
+def test_blocking_read():
+    buf = circbuf.CircBuf(16)
+    thread = _start(lambda: (time.sleep(0.01), buf.write(bytes(range(8)))))
+
+    tools.eq_(buf.read(8, block=True, timeout=10), bytes(range(8)))
+    thread.join()
+    tools.eq_(buf.read(8, block=True, timeout=0.01), bytes())
+
+
+def test_blocking_write():
+    buf = circbuf.CircBuf(16)
+    data = _data(100)
+    received = []
+
+    def consume():
+        while sum(map(len, received)) < len(data):
+            received.append(buf.read(block=True, timeout=10))
+
+    thread = _start(consume)
+    tools.eq_(buf.write(data, block=True, timeout=10), len(data))
+    thread.join()
+    tools.eq_(bytes().join(received), data)
+
+
+def test_blocking_write_times_out():
+    buf = circbuf.CircBuf(16)
+
+    tools.eq_(buf.write(bytes(20), block=True, timeout=0.01), 15)
+    tools.eq_(buf.write(bytes(20), block=True, timeout=0.01), None)
+
+
+def test_overwrite_drops_oldest():
+    for factory in _factories():
+        dut = factory(overflow='overwrite')
+        size = dut.capacity
+        data = _data(size + size // 2)
+        dut.write(data[:size // 2])
+
+        tools.eq_(dut.write(data[size // 2:size]), size // 2)
+        tools.eq_(dut.dropped, 1)
+        tools.eq_(dut.read(), data[1:size])
+        tools.eq_(dut.write(data), size - 1)
+        tools.eq_(dut.dropped, 1 + len(data) - (size - 1))
+        tools.eq_(dut.read(), data[-(size - 1):])
+
+
+def test_overwrite_write_never_blocks():
+    dut = circbuf.CircBuf(16, overflow='overwrite')
+
+    start = time.monotonic()
+    tools.eq_(dut.write(_data(30), block=True), 15)
+    tools.eq_(dut.write(_data(30), block=True, timeout=1), 15)
+    tools.ok_(time.monotonic() - start < 1)
+    tools.eq_(dut.dropped, 45)
+    with dut.as_writer() as writer:
+        tools.eq_(writer.write(_data(30)), 15)
+    tools.eq_(dut.read(), _data(30)[15:])
+
+
+def test_overwrite_wraps():
+    for pos in range(16):
+        dut = circbuf.CircBuf(16, overflow='overwrite')
+        dut.write(bytes(pos))
+        dut.read()
+        dut.write(_data(10))
+
+        tools.eq_(dut.write(_data(10)), 10)
+        tools.eq_(dut.read(), _data(10)[5:] + _data(10))
+
+
+def test_overwrite_realign_record_size():
+    dut = circbuf.CircBuf(16, overflow='overwrite', realign=4)
+    dut.write(_data(12))
+
+    tools.eq_(dut.write(_data(8)), 8)
+    tools.eq_(dut.dropped, 8)
+    tools.eq_(dut.read(), _data(12)[8:] + _data(8))
+    tools.eq_(dut.write(_data(18)), 14)
+    tools.eq_(dut.dropped, 8 + 4)
+    tools.eq_(dut.read(), _data(18)[4:])
+
+
+def test_overwrite_realign_delimiter():
+    dut = circbuf.CircBuf(16, overflow='overwrite', realign=b'\n')
+    dut.write(b'ab\ncdef\ngh\n')
+
+    tools.eq_(dut.write(b'ijkl\n'), 5)
+    tools.eq_(dut.read(), b'cdef\ngh\nijkl\n')
+    tools.eq_(dut.dropped, 3)
+    dut.write(b'abcdefghij')
+    tools.eq_(dut.write(b'klmnop\n'), 7)
+    tools.eq_(dut.dropped, 13)
+    tools.eq_(dut.read(), b'klmnop\n')
+
+
+def test_overwrite_waits_for_consumer_buf():
+    dut = circbuf.CircBuf(16, overflow='overwrite')
+    dut.write(_data(15))
+    written = []
+
+    with dut.consumer_buf as mv:
+        thread = threading.Thread(
+            target=lambda: written.append(dut.write(_data(4))))
+        thread.start()
+        thread.join(.05)
+        tools.ok_(thread.is_alive())
+        tools.eq_(bytes(mv), _data(15))
+    thread.join()
+    tools.eq_(written, [4])
+    tools.eq_(dut.read(), _data(15)[4:] + _data(4))
+
+
+@tools.raises(ValueError)
+def test_overwrite_requires_lock():
+    circbuf.CircBuf(16, sync='spsc', overflow='overwrite')
+
+
+@tools.raises(ValueError)
+def test_realign_requires_overwrite():
+    circbuf.CircBuf(16, realign=4)
+
+
+@tools.raises(ValueError)
+def test_init_raises_if_unknown_overflow():
+    circbuf.CircBuf(16, overflow='drop')
+
+
+def test_stats():
+    dut = circbuf.CircBuf(16, stats=True)
+    dut.write(_data(10))
+    dut.read(4)
+    dut.write(_data(10))
+    dut.read()
+    dut.read()
+
+    stats = dut.stats()
+    tools.eq_(stats['produced'], 19)
+    tools.eq_(stats['consumed'], 19)
+    tools.eq_(stats['high_water'], 15)
+    tools.eq_(stats['full'], 1)
+    tools.eq_(stats['empty'], 1)
+    tools.eq_(dut.stats(reset=True), stats)
+    tools.eq_(dut.stats()['produced'], 0)
+
+
+def test_stats_write_many():
+    for overflow, full in (('reject', 2), ('overwrite', 1)):
+        dut = circbuf.CircBuf(16, overflow=overflow, stats=True)
+        dut.write_many((_data(8), _data(4)))
+        dut.write_many((_data(8), _data(4)))
+        dut.writelines((_data(8), _data(12)))
+        tools.eq_(dut.stats()['full'], full, overflow)
+
+
+def test_stats_disabled_has_no_overhead():
+    tools.ok_(type(circbuf.CircBuf(16)) is circbuf.CircBuf)
+    tools.ok_(not hasattr(circbuf.CircBuf(16), 'stats'))
+    tools.ok_(isinstance(circbuf.CircBuf(16)._producer_lock,
+                         type(threading.Lock())))
+
+
+def test_stats_callback():
+    events = []
+    dut = circbuf.CircBuf(16, stats=lambda event, buf: events.append(event))
+    dut.write(_data(4))
+    dut.write(_data(4))
+    dut.read(8)
+    dut.read(8)
+    dut.write(_data(16))
+
+    tools.eq_(events, ['high_water', 'high_water', 'empty', 'high_water',
+                       'full'])
+
+
+def test_stats_lock_wait():
+    dut = circbuf.CircBuf(16, stats=True)
+
+    with dut.consumer_buf:
+        thread = threading.Thread(target=dut.read)
+        thread.start()
+        time.sleep(.05)
+    thread.join()
+    tools.ok_(dut.stats()['consumer_lock_wait'] >= .04)
+    tools.eq_(dut.stats()['producer_lock_wait'], 0)
+
+
+def test_stats_combined_with_spsc_and_overwrite():
+    dut = circbuf.CircBuf(16, sync='spsc', stats=True)
+    dut.write(_data(16))
+    tools.eq_(dut.stats()['produced'], 15)
+
+    dut = circbuf.CircBuf(16, overflow='overwrite', stats=True)
+    dut.write(_data(12))
+    dut.write(_data(12))
+    tools.eq_(dut.stats()['produced'], 24)
+    tools.eq_(dut.stats()['full'], 0)
+    tools.eq_(dut.dropped, 9)
+
+
+@tools.raises(ValueError)
+def test_init_raises_if_invalid_stats():
+    circbuf.CircBuf(16, stats='yes')
+
+
+def test_resize_keeps_data():
+    for size in (8, 32):
+        for pos in range(16):
+            dut = circbuf.CircBuf(16)
+            _advance(dut, pos)
+            dut.write(_data(7))
+
+            dut.resize(size)
+            tools.eq_(dut.capacity, size)
+            tools.eq_(len(dut), 7)
+            tools.eq_(dut.write(_data(size)), size - 8 or None)
+            tools.eq_(dut.read(), _data(7) + _data(size - 8))
+
+
+def test_resize_mirrored():
+    _require_mirror()
+    dut = circbuf.CircBuf(mmap.PAGESIZE, mirrored=True)
+    _advance(dut, mmap.PAGESIZE - 2)
+    dut.write(_data(4))
+
+    dut.resize(2 * mmap.PAGESIZE)
+    tools.ok_(dut._mirror is not None)
+    tools.eq_(dut.read(), _data(4))
+
+
+@tools.raises(ValueError)
+def test_resize_raises_if_data_exceeds_size():
+    dut = circbuf.CircBuf(16)
+    dut.write(_data(8))
+    dut.resize(8)
+
+
+@tools.raises(RuntimeError)
+def test_resize_raises_if_spsc():
+    circbuf.CircBuf(16, sync='spsc').resize(32)
+
+
+def test_resize_wakes_writers():
+    dut = circbuf.CircBuf(16)
+    dut.write(_data(15))
+    thread = threading.Thread(target=dut.write, args=(_data(8),),
+                              kwargs={'block': True})
+    thread.start()
+    time.sleep(.01)
+
+    dut.resize(32)
+    thread.join(1)
+    tools.ok_(not thread.is_alive())
+    tools.eq_(len(dut), 23)
+
+
+def test_auto_resize_grows_up_to_max_size():
+    dut = circbuf.CircBuf(16, max_size=64)
+    dut.write(_data(15))
+
+    tools.eq_(dut.write(_data(8)), None)
+    tools.eq_(dut.capacity, 16)
+    tools.eq_(dut.write(_data(8)), 8)
+    tools.eq_(dut.capacity, 32)
+    dut.write(_data(40))
+    dut.write(_data(40))
+    tools.eq_(dut.capacity, 64)
+    tools.eq_(len(dut), 63)
+    dut.write(_data(1))
+    dut.write(_data(1))
+    tools.eq_(dut.capacity, 64)
+
+
+def test_auto_resize_grows_on_write_many_and_transfer_to():
+    dut = circbuf.CircBuf(16, max_size=64)
+    dut.write(_data(15))
+
+    tools.eq_(dut.write_many((_data(4), _data(4))), None)
+    tools.eq_(dut.write_many((_data(4), _data(4))), 8)
+    tools.eq_(dut.capacity, 32)
+    src = circbuf.CircBuf(64)
+    src.write(_data(20))
+    tools.eq_(src.transfer_to(dut), 8)
+    tools.eq_(src.transfer_to(dut), 12)
+    tools.eq_(dut.capacity, 64)
+    tools.eq_(dut.read(), _data(15) + _data(4) * 2 + _data(20))
+
+
+def test_auto_resize_shrinks_down_to_size():
+    dut = circbuf.CircBuf(16, max_size=64)
+    dut.resize(64)
+    for _ in range(circbuf._AutoResize._SHRINK_AFTER - 1):
+        dut.write(_data(4))
+        dut.read()
+    tools.eq_(dut.capacity, 64)
+    dut.write(_data(4))
+    dut.read(2)
+    tools.eq_(dut.capacity, 32)
+    tools.eq_(dut.read(), _data(4)[2:])
+    for _ in range(4 * circbuf._AutoResize._SHRINK_AFTER):
+        dut.write(_data(2))
+        dut.read()
+    tools.eq_(dut.capacity, 16)
+
+
+@tools.raises(ValueError)
+def test_init_raises_if_max_size_below_size():
+    circbuf.CircBuf(16, max_size=8)
+
+
+@tools.raises(ValueError)
+def test_init_raises_if_max_size_and_overwrite():
+    circbuf.CircBuf(16, max_size=32, overflow='overwrite')
+
+
+def test_overwrite_write_many():
+    dut = circbuf.CircBuf(16, overflow='overwrite')
+    dut.write(_data(10))
+
+    tools.eq_(dut.write_many((_data(4), _data(4))), 8)
+    tools.eq_(dut.read(), _data(10)[3:] + _data(4) + _data(4))
@@ -0,0 +1,112 @@
+from nose import tools
+import struct
+import circbuf
+from circbuf import framing
+
+
+def _buf(tail=0, size=16):
+    buf = circbuf.CircBuf(size)
+    with buf.producer_buf:
+        buf.produced(tail)
+    with buf.consumer_buf:
+        buf.consumed(tail)
+    return buf
+
+
+def test_readline():
+    for tail in range(16):
+        buf = _buf(tail)
+        buf.write(b'ab\ncd\nef')
+
+        tools.eq_(framing.readline(buf), b'ab\n')
+        tools.eq_(framing.readline(buf), b'cd\n')
+        tools.eq_(framing.readline(buf), None)
+        buf.write(b'\n')
+        tools.eq_(framing.readline(buf), b'ef\n')
+        tools.eq_(len(buf), 0)
+
+
+def test_read_until():
+    buf = _buf(12)
+    buf.write(b'abc\r\ndef')
+
+    tools.eq_(framing.read_until(buf, b'\r\n'), b'abc\r\n')
+    tools.eq_(framing.read_until(buf, 0x66), b'def')
+
+
+@tools.raises(ValueError)
+def test_read_until_raises_if_full():
+    buf = _buf()
+    buf.write(bytes(15))
+
+    framing.read_until(buf, b'\n')
+
+
+def test_read_frame():
+    for tail in range(16):
+        buf = _buf(tail)
+        buf.write(struct.pack('>H', 3) + b'abc' + struct.pack('>H', 4) + b'd')
+
+        tools.eq_(framing.read_frame(buf, '>H'), b'abc')
+        tools.eq_(framing.read_frame(buf, '>H'), None)
+        buf.write(b'efg')
+        tools.eq_(framing.read_frame(buf, '>H'), b'defg')
+        tools.eq_(len(buf), 0)
+
+
+@tools.raises(ValueError)
+def test_read_frame_raises_if_frame_exceeds_buffer():
+    buf = _buf()
+    buf.write(struct.pack('B', 15))
+
+    framing.read_frame(buf, 'B')
+
+
+def test_frames():
+    for tail in range(16):
+        buf = _buf(tail)
+        buf.write(b'ab\ncd\nef')
+
+        result = []
+        for frame in framing.frames(buf, b'\n'):
+            tools.ok_(isinstance(frame, (bytes, memoryview)))
+            result.append(bytes(frame))
+        tools.eq_(result, [b'ab\n', b'cd\n'])
+        tools.eq_(buf.read(), b'ef')
+
+
+def test_frames_memoryview_if_contiguous():
+    buf = _buf(12)
+    buf.write(b'ab\ncd\n')
+
+    it = framing.frames(buf, delim=b'\n')
+    frame = next(it)
+    tools.eq_(frame, b'ab\n')
+    tools.ok_(isinstance(frame, memoryview))
+    tools.eq_(next(it), b'cd\n')
+    tools.assert_raises(ValueError, frame.tobytes)
+    tools.eq_(tuple(it), ())
+
+
+def test_frames_length_prefixed():
+    buf = _buf(5)
+    buf.write(bytes.fromhex('02 aa bb 01 cc 03 dd'))
+
+    tools.eq_([bytes(frame) for frame in framing.frames(buf, struct_fmt='B')],
+              [bytes.fromhex('aa bb'), bytes.fromhex('cc')])
+    tools.eq_(len(buf), 2)
+
+
+def test_frames_not_consumed_if_closed():
+    buf = _buf()
+    buf.write(b'ab\ncd\n')
+
+    it = framing.frames(buf, b'\n')
+    next(it)
+    it.close()
+    tools.eq_(buf.read(), b'ab\ncd\n')
+
+
+@tools.raises(ValueError)
+def test_frames_requires_either_delim_or_struct_fmt():
+    next(framing.frames(_buf(), b'\n', 'B'))
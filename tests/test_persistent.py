@@ -0,0 +1,101 @@
+from nose import tools
+from unittest import mock
+import contextlib
+import os
+import multiprocessing
+import tempfile
+import circbuf
+from circbuf import persistent
+
+
+@contextlib.contextmanager
+def _journal():
+    with tempfile.TemporaryDirectory() as tmp:
+        yield os.path.join(tmp, 'journal')
+
+
+def test_init():
+    with _journal() as path:
+        dut = persistent.PersistentCircBuf(path, 16)
+
+        tools.ok_(isinstance(dut, circbuf.CircBuf))
+        tools.eq_((dut.capacity, len(dut), dut.generation), (16, 0, 0))
+        dut.close()
+
+
+def test_reopen_recovers():
+    with _journal() as path:
+        dut = persistent.PersistentCircBuf(path, 16)
+        dut.write(bytes(12))
+        dut.read(12)
+        dut.write(b'abcdefgh')
+        dut.read(2)
+        dut.close()
+
+        dut = persistent.PersistentCircBuf(path, 1024)
+        tools.eq_((dut.capacity, dut.generation), (16, 1))
+        tools.eq_(dut.find(b'fg'), 3)
+        tools.eq_(dut.read(), b'cdefgh')
+        dut.close()
+
+
+def test_recovers_after_crash():
+    with _journal() as path:
+        process = multiprocessing.get_context().Process(
+            target=_crash, args=(path,))
+        process.start()
+        process.join()
+
+        dut = persistent.PersistentCircBuf(path)
+        tools.eq_(dut.read(), b'survived')
+        dut.close()
+
+
+@tools.raises(ValueError)
+def test_raises_if_no_header():
+    with _journal() as path:
+        with open(path, 'wb') as f:
+            f.write(bytes(1024))
+        persistent.PersistentCircBuf(path)
+
+
+@tools.raises(ValueError)
+def test_raises_if_msync_invalid():
+    with _journal() as path:
+        persistent.PersistentCircBuf(path, msync='always')
+
+
+def test_msync():
+    for msync, flushes in (('never', 0), ('produced', 3), (4, 1)):
+        with _journal() as path:
+            dut = persistent.PersistentCircBuf(path, 16, msync=msync)
+            with mock.patch.object(
+                    persistent.PersistentCircBuf, 'sync', autospec=True,
+                    side_effect=persistent.PersistentCircBuf.sync) as sync:
+                dut.write(b'ab')
+                dut.write(b'cd')
+                dut.write(b'e')
+                tools.eq_(sync.call_count, flushes, msync)
+            dut.close()
+
+
+def test_sync_flushes_wrapped_data():
+    with _journal() as path:
+        dut = persistent.PersistentCircBuf(path, 2 ** 16, msync=16)
+        dut.write(bytes(2 ** 16 - 8))
+        dut.sync()
+        dut.read()
+        with mock.patch.object(persistent.PersistentCircBuf,
+                               '_flush') as flush:
+            dut.write(bytes(16))
+            tools.eq_(flush.call_args_list, [
+                mock.call(persistent.HEADER + 2 ** 16 - 8, 8),
+                mock.call(persistent.HEADER, 8),
+                mock.call(0, persistent.HEADER)])
+        dut.close()
+
+
+def _crash(path):
+    buf = persistent.PersistentCircBuf(path)
+    buf.write(b'survived')
+    os._exit(1)
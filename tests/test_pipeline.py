@@ -0,0 +1,120 @@
+from nose import tools
+import zlib
+import circbuf
+from circbuf import pipeline
+
+
+DATA = bytes(range(256)) * 64 + b'trailer'
+
+
+def _feed(buf, data):
+    written = buf.write(data) or 0
+    return data[written:]
+
+
+def test_inflate_crc32_run():
+    source, sink = circbuf.CircBuf(256), circbuf.CircBuf(2 ** 16)
+    crc = pipeline.CRC32(zlib.crc32(DATA))
+    dut = pipeline.Pipeline(source, sink, (pipeline.Inflate(), crc), 128)
+    rest = zlib.compress(DATA)
+
+    while rest:
+        rest = _feed(source, rest)
+        tools.ok_(not dut.run())
+    source.feed_eof()
+    tools.ok_(dut.run())
+    tools.eq_(sink.read(), DATA)
+    tools.eq_(crc.crc, zlib.crc32(DATA))
+    tools.ok_(sink._eof)
+
+
+def test_deflate_inflate_small_buffers():
+    source, sink = circbuf.CircBuf(64), circbuf.CircBuf(64)
+    dut = pipeline.Pipeline(source, sink, (
+        pipeline.Deflate(), pipeline.Inflate()), 16)
+    rest, result = DATA, bytearray()
+
+    while not dut.run():
+        rest = _feed(source, rest)
+        if not rest:
+            source.feed_eof()
+        result += sink.read()
+    result += sink.read()
+    tools.eq_(bytes(result), DATA)
+
+
+def test_threads():
+    source, sink = circbuf.CircBuf(1024), circbuf.CircBuf(1024)
+    dut = pipeline.Pipeline(source, sink, (
+        pipeline.Deflate(wbits=31), pipeline.Inflate(wbits=31),
+        pipeline.CRC32(zlib.crc32(DATA))), 256)
+    reader, writer = sink.as_reader(timeout=5), source.as_writer(timeout=5)
+
+    dut.start()
+    writer.write(DATA)
+    writer.close()
+    tools.eq_(reader.readall(), DATA)
+    tools.ok_(dut.join(5))
+
+    stats = dut.stats()
+    tools.eq_([s['name'] for s in stats], ['Deflate', 'Inflate', 'CRC32'])
+    tools.eq_(stats[0]['bytes_in'], len(DATA))
+    tools.eq_(stats[0]['bytes_out'], stats[1]['bytes_in'])
+    tools.eq_(stats[2]['bytes_out'], len(DATA))
+    tools.ok_(all(s['throughput'] > 0 for s in stats))
+
+
+@tools.raises(ValueError)
+def test_crc32_mismatch_raises_on_join():
+    source, sink = circbuf.CircBuf(256), circbuf.CircBuf(256)
+    dut = pipeline.Pipeline(source, sink, (pipeline.CRC32(1),))
+
+    dut.start()
+    source.write(b'abc')
+    source.feed_eof()
+    dut.join(5)
+
+
+def test_callable_stage():
+    def upper(segment, dst):
+        return dst.write(bytes(segment).upper()) or 0
+
+    source, sink = circbuf.CircBuf(16), circbuf.CircBuf(16)
+    dut = pipeline.Pipeline(source, sink, (upper,))
+    source.write(b'abc')
+    source.feed_eof()
+
+    tools.ok_(dut.run())
+    tools.eq_(sink.read(), b'ABC')
+    tools.eq_(dut.stats()[0]['name'], 'upper')
+
+
+def _pairs(segment, dst):
+    # waits for 2 contiguous bytes, which never come across the wrap
+    cnt = len(segment) // 2 * 2
+    return dst.write(segment[:cnt]) or 0 if cnt else 0
+
+
+@tools.raises(RuntimeError)
+def test_stage_without_progress_raises_on_run():
+    source, sink = circbuf.CircBuf(16), circbuf.CircBuf(16)
+    source.write(bytes(15))
+    source.read()
+    source.write(bytes(15))
+    pipeline.Pipeline(source, sink, (_pairs,)).run()
+
+
+@tools.raises(RuntimeError)
+def test_stage_without_progress_raises_on_join():
+    source, sink = circbuf.CircBuf(16), circbuf.CircBuf(16)
+    source.write(bytes(15))
+    source.read()
+    source.write(bytes(15))
+    dut = pipeline.Pipeline(source, sink, (_pairs,))
+    dut.start()
+    tools.ok_(dut.join(5))
+
+
+@tools.raises(ValueError)
+def test_init_raises_without_stages():
+    pipeline.Pipeline(circbuf.CircBuf(16), circbuf.CircBuf(16), ())
@@ -0,0 +1,125 @@
+from nose import tools
+import asyncio
+import circbuf
+from circbuf import aio, pool
+
+
+def test_acquire_is_lazy():
+    dut = pool.CircBufPool(16, 4)
+    buf = dut.acquire()
+
+    tools.ok_(isinstance(buf, circbuf.CircBuf))
+    tools.ok_(not buf.attached)
+    tools.eq_(buf.capacity, 16)
+    tools.eq_(len(buf), 0)
+    tools.eq_(buf.read(), b'')
+    tools.eq_(buf.find(b'a'), -1)
+    tools.eq_(dut.occupancy(), {'buffers': 1, 'idle': 0, 'attached': 0,
+                                'slots': 4})
+
+
+def test_attach_once_produced():
+    dut = pool.CircBufPool(16, 4)
+    buf = dut.acquire()
+
+    tools.eq_(buf.write(b'abc'), 3)
+    tools.ok_(buf.attached)
+    tools.eq_(dut.occupancy()['attached'], 1)
+    tools.eq_(buf.find(b'c'), 2)
+    tools.eq_(buf.read(), b'abc')
+
+
+def test_buffers_dont_overlap():
+    dut = pool.CircBufPool(16, 4)
+    bufs = [dut.acquire() for _ in range(4)]
+    for i, buf in enumerate(bufs):
+        buf.write(bytes((i,)) * 15)
+
+    for i, buf in enumerate(bufs):
+        tools.eq_(buf.read(), bytes((i,)) * 15)
+
+
+def test_detach_if_empty():
+    dut = pool.CircBufPool(16, 4)
+    buf = dut.acquire()
+    buf.write(b'abc')
+
+    tools.ok_(not buf.detach())
+    buf.read()
+    tools.ok_(buf.detach())
+    tools.eq_(dut.occupancy()['attached'], 0)
+    buf.write(b'de')
+    tools.eq_(buf.read(), b'de')
+
+
+def test_release_recycles():
+    dut = pool.CircBufPool(16, 4)
+    buf = dut.acquire()
+    buf.write(b'abc')
+
+    buf.release()
+    tools.eq_(dut.occupancy(), {'buffers': 0, 'idle': 1, 'attached': 0,
+                                'slots': 4})
+    again = dut.acquire()
+    tools.ok_(again is buf)
+    tools.eq_(len(again), 0)
+
+
+def _read_async(buf):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(aio.AsyncCircBuf(buf).read())
+    finally:
+        loop.close()
+
+
+def test_release_resets_eof_and_waiters():
+    dut = pool.CircBufPool(16, 4)
+    buf = dut.acquire()
+    fd = buf.readable_fd()
+    buf.feed_eof()
+
+    buf.release()
+    again = dut.acquire()
+    tools.ok_(again is buf)
+    tools.eq_((again._eof, again._readers, again._writers), (False, [], []))
+    tools.eq_(again.as_reader(block=False).read(1), None)
+    fd.close()
+    again.write(b'a')
+    tools.eq_(_read_async(again), b'a')
+
+
+def test_slabs_are_added():
+    dut = pool.CircBufPool(16, 2)
+    bufs = [dut.acquire() for _ in range(3)]
+    for buf in bufs:
+        buf.write(b'a')
+
+    tools.eq_(dut.occupancy()['slots'], 4)
+    tools.eq_(dut.occupancy()['attached'], 3)
+
+
+@tools.raises(RuntimeError)
+def test_raises_if_exhausted():
+    dut = pool.CircBufPool(16, 2, lazy=False, max_slabs=1)
+    for _ in range(3):
+        dut.acquire()
+
+
+@tools.raises(RuntimeError)
+def test_resize_raises():
+    pool.CircBufPool(16, 2).acquire().resize(32)
+
+
+@tools.raises(ValueError)
+def test_init_raises_if_not_pwr_of_two():
+    pool.CircBufPool(15)
+
+
+def test_spsc():
+    buf = pool.CircBufPool(16, 2, sync='spsc').acquire()
+
+    with buf.producer_buf as mv:
+        mv[:2] = b'ab'
+        buf.produced(2)
+    tools.eq_(buf.read(), b'ab')
@@ -0,0 +1,152 @@
+from nose import tools
+import os
+import selectors
+import socket
+import circbuf
+from circbuf import pump
+
+
+def _socketpair():
+    a, b = socket.socketpair()
+    a.setblocking(False)
+    b.setblocking(False)
+    return a, b
+
+
+def _events(dut, fileobj):
+    try:
+        return dut.selector.get_key(fileobj).events
+    except KeyError:
+        return 0
+
+
+def test_echo():
+    a, b = _socketpair()
+    data = bytes(range(256)) * 16
+
+    def echo(link):
+        link.rx.transfer_to(link.tx)
+
+    with pump.Pump() as dut, a, b:
+        buf = circbuf.CircBuf(64)
+        dut.register(a, buf, buf, echo)
+        b.sendall(data[:100])
+        result = bytearray()
+        rest = data[100:]
+        while len(result) < len(data):
+            dut.poll(1)
+            try:
+                result += b.recv(4096)
+                rest = rest[b.send(rest):]
+            except BlockingIOError:
+                pass
+        tools.eq_(bytes(result), data)
+
+
+def test_interest_follows_buffers():
+    a, b = _socketpair()
+    rx, tx = circbuf.CircBuf(16), circbuf.CircBuf(16)
+
+    with pump.Pump() as dut, a, b:
+        dut.register(a, rx, tx)
+        tools.eq_(_events(dut, a), selectors.EVENT_READ)
+
+        tx.write(b'abc')
+        dut.update(a)
+        tools.eq_(_events(dut, a),
+                  selectors.EVENT_READ | selectors.EVENT_WRITE)
+        tools.eq_(dut.poll(1), 1)
+        tools.eq_(b.recv(16), b'abc')
+        tools.eq_(_events(dut, a), selectors.EVENT_READ)
+
+        b.send(bytes(20))
+        dut.poll(1)
+        tools.eq_(len(rx), 15)
+        tools.eq_(_events(dut, a), 0)
+        rx.read()
+        dut.update(a)
+        dut.poll(1)
+        tools.eq_(len(rx), 5)
+
+
+def test_wrapped_segments_single_call():
+    a, b = _socketpair()
+    rx = circbuf.CircBuf(16)
+    rx.write(bytes(12))
+    rx.read()
+
+    with pump.Pump() as dut, a, b:
+        dut.register(a, rx)
+        b.send(bytes(range(10)))
+        tools.eq_(dut.poll(1), 1)
+        tools.eq_(rx.read(), bytes(range(10)))
+
+
+def test_eof_and_error():
+    a, b = _socketpair()
+    rx, tx = circbuf.CircBuf(16), circbuf.CircBuf(16)
+    calls = []
+
+    with pump.Pump() as dut, a:
+        link = dut.register(a, rx, callback=calls.append)
+        b.close()
+        dut.poll(1)
+        tools.ok_(link.eof and rx._eof)
+        tools.eq_(calls, [link])
+        tools.eq_(_events(dut, a), 0)
+
+        link.tx = tx
+        tx.write(b'abc')
+        dut.update(a)
+        dut.poll(1)
+        tools.ok_(isinstance(link.error, OSError))
+        tools.eq_(len(tx), 3)
+        tools.eq_(_events(dut, a), 0)
+
+
+def test_callback_unregisters_ready_link():
+    (a, b), (c, d) = _socketpair(), _socketpair()
+    calls = []
+
+    def close_both(link):
+        calls.append(link)
+        for sock in (a, c):
+            dut.unregister(sock)
+            sock.close()
+
+    with pump.Pump() as dut, b, d:
+        dut.register(a, circbuf.CircBuf(16), callback=close_both)
+        dut.register(c, circbuf.CircBuf(16), callback=close_both)
+        b.send(b'x')
+        d.send(b'y')
+        tools.eq_(dut.poll(1), 2)
+        tools.eq_(len(calls), 1)
+        tools.eq_(calls[0].error, None)
+        tools.eq_(len(dut), 0)
+
+
+def test_pipe():
+    r, w = os.pipe()
+    os.set_blocking(r, False)
+    os.set_blocking(w, False)
+    rx, tx = circbuf.CircBuf(16), circbuf.CircBuf(16)
+    tx.write(b'xyz')
+
+    with pump.Pump() as dut:
+        dut.register(w, tx=tx)
+        dut.register(r, rx)
+        while len(rx) < 3:
+            dut.poll(1)
+        tools.eq_(rx.read(), b'xyz')
+        tools.eq_(len(dut), 2)
+        dut.unregister(w)
+        tools.eq_(len(dut), 1)
+    os.close(r)
+    os.close(w)
+
+
+@tools.raises(ValueError)
+def test_register_twice_raises():
+    with pump.Pump() as dut:
+        dut.register(0, tx=circbuf.CircBuf(16))
+        dut.register(0, tx=circbuf.CircBuf(16))
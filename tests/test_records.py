@@ -0,0 +1,238 @@
+from nose import SkipTest, tools
+from unittest import mock
+import os
+import socket
+import circbuf
+from circbuf import records
+
+
+def _records(cnt, size=16):
+    return bytes(i // size + 1 for i in range(cnt * size))
+
+
+def test_init():
+    dut = records.RecordCircBuf(16, 8)
+
+    tools.ok_(isinstance(dut, circbuf.CircBuf))
+    tools.eq_(len(dut), 0)
+    tools.eq_(dut.capacity, 8)
+    tools.eq_(dut.record_size, 16)
+    tools.eq_(dut.space_avail, 7)
+
+
+@tools.raises(ValueError)
+def test_init_raises_if_not_pwr_of_two():
+    records.RecordCircBuf(16, 6)
+
+
+@tools.raises(ValueError)
+def test_init_raises_if_record_size_not_positive():
+    records.RecordCircBuf(0, 8)
+
+
+def test_write_read_counts_records():
+    dut = records.RecordCircBuf(16, 8)
+
+    tools.eq_(dut.write(_records(3)), 48)
+    tools.eq_(len(dut), 3)
+    tools.eq_(dut.read(2), _records(2))
+    tools.eq_(len(dut), 1)
+
+
+@tools.raises(ValueError)
+def test_write_raises_if_partial_record():
+    records.RecordCircBuf(16, 8).write(bytes(20))
+
+
+def test_write_wraps():
+    data = _records(7)
+    for pos in range(8):
+        dut = records.RecordCircBuf(16, 8)
+        dut.write(bytes(16 * pos))
+        dut.read()
+
+        tools.eq_(dut.write(data), len(data))
+        tools.eq_(dut.write(data), None)
+        tools.eq_(dut.peek(), data)
+        tools.eq_(dut.read(), data)
+
+
+def test_readinto_whole_records():
+    dut = records.RecordCircBuf(16, 8)
+    dut.write(_records(3))
+    b = bytearray(40)
+
+    tools.eq_(dut.readinto(b), 32)
+    tools.eq_(bytes(b[:32]), _records(2))
+    tools.eq_(len(dut), 1)
+
+
+def test_producer_buf_counts_records():
+    dut = records.RecordCircBuf(16, 8)
+
+    with dut.producer_buf as mv:
+        tools.eq_(len(mv), 7)
+        tools.eq_(mv.nbytes, 7 * 16)
+        dut.produced(2)
+    with dut.consumer_buf as mv:
+        tools.eq_(len(mv), 2)
+
+
+def test_consumer_array():
+    dut = records.RecordCircBuf(4, 8)
+    dut.write(_records(3, 4))
+
+    with dut.consumer_array as arr:
+        tools.eq_(len(arr), 3)
+        tools.eq_(arr.tolist()[1], [2] * 4)
+        dut.consumed(len(arr))
+    tools.eq_(len(dut), 0)
+
+
+def test_producer_array_is_zero_copy():
+    dut = records.RecordCircBuf(4, 8)
+
+    with dut.producer_array as arr:
+        tools.eq_(len(arr), 7)
+        arr[0, 0] = arr[1, 3] = arr[6, 0] = 9
+        dut.produced(2)
+    tools.eq_(dut.read(), bytes((9, 0, 0, 0, 0, 0, 0, 9)))
+
+
+def test_arrays_of_empty_buffer():
+    dut = records.RecordCircBuf(4, 8)
+
+    with dut.consumer_array as arr:
+        tools.eq_(len(arr), 0)
+
+
+def test_dtype():
+    if records.numpy is None:
+        raise SkipTest('numpy is not installed')
+    numpy = records.numpy
+    dtype = numpy.dtype([('t', '<u8'), ('value', '<f8')])
+    dut = records.RecordCircBuf(dtype, 8)
+    tools.eq_(dut.record_size, 16)
+
+    with dut.producer_array as arr:
+        arr['t'][:3] = (1, 2, 3)
+        arr['value'][:3] = (.5, 1.5, 2.5)
+        dut.produced(3)
+    with dut.consumer_array as arr:
+        tools.eq_(arr.dtype, dtype)
+        tools.eq_(arr['value'].sum(), 4.5)
+        dut.consumed(len(arr))
+
+
+@tools.raises(RuntimeError)
+def test_dtype_requires_numpy():
+    if records.numpy is not None:
+        raise SkipTest('numpy is installed')
+    records.RecordCircBuf('<f8', 8)
+
+
+def test_spsc():
+    dut = records.RecordCircBuf(16, 8, sync='spsc')
+
+    tools.ok_(isinstance(dut, records.RecordCircBuf))
+    dut.write(_records(2))
+    with dut.consumer_array as arr:
+        dut.consumed(len(arr))
+    tools.eq_(len(dut), 0)
+
+
+def test_resize():
+    dut = records.RecordCircBuf(16, 4)
+    dut.write(_records(2))
+    dut.read(1)
+    dut.write(_records(2))
+
+    dut.resize(8)
+    tools.eq_(dut.capacity, 8)
+    tools.eq_(dut.read(), _records(2)[16:] + _records(2))
+
+
+def test_write_many():
+    dut = records.RecordCircBuf(16, 4)
+
+    tools.eq_(dut.write_many((_records(1), _records(2)[16:])), 32)
+    tools.eq_(dut.write_many((_records(1), _records(1))), None)
+    tools.eq_(dut.read(), _records(2))
+
+
+def test_write_many_checks_space_under_producer_lock():
+    dut = records.RecordCircBuf(16, 4)
+    space_avail = records.RecordCircBuf.space_avail.fget
+    locked = []
+
+    def check(self):
+        locked.append(self._producer_lock.locked())
+        return space_avail(self)
+    with mock.patch.object(records.RecordCircBuf, 'space_avail',
+                           property(check)):
+        tools.eq_(dut.write_many((_records(1), _records(2)[16:])), 32)
+        tools.eq_(dut.write_many((_records(1), _records(1))), None)
+
+    tools.ok_(locked and all(locked))
+    tools.eq_(dut.read(), _records(2))
+
+
+@tools.raises(ValueError)
+def test_write_many_raises_if_not_whole_records():
+    records.RecordCircBuf(16, 4).write_many((_records(1), bytes(8)))
+
+
+def test_socket_helpers_raise_prior_io():
+    dut = records.RecordCircBuf(4, 8)
+    dut.write(_records(2, 4))
+    a, b = socket.socketpair()
+
+    with a, b:
+        b.send(bytes(10))
+        for helper in (circbuf.recv_from, circbuf.send_to,
+                       lambda buf, sock: circbuf.recv(buf, sock.recv_into)):
+            tools.assert_raises(ValueError, helper, dut, a)
+        tools.eq_(a.recv(16), bytes(10))
+        b.setblocking(False)
+        tools.assert_raises(BlockingIOError, b.recv, 1)
+    tools.eq_(dut.read(), _records(2, 4))
+
+
+def test_transfer_to_byte_buffer():
+    src, dst = records.RecordCircBuf(4, 8), circbuf.CircBuf(16)
+    src.write(_records(6, 4))
+
+    tools.eq_(src.transfer_to(dst, 1), 4)
+    tools.eq_(src.transfer_to(dst), 8)
+    tools.eq_(dst.read(), _records(3, 4))
+    tools.eq_(len(src), 3)
+
+
+def test_transfer_to_record_buffer():
+    src, dst = circbuf.CircBuf(16), records.RecordCircBuf(4, 4)
+    src.write(_records(2, 4) + b'xy')
+
+    tools.eq_(src.transfer_to(dst), 8)
+    tools.eq_(src.read(), b'xy')
+    tools.eq_(dst.read(), _records(2, 4))
+
+    src, other = records.RecordCircBuf(4, 8), records.RecordCircBuf(8, 4)
+    src.write(_records(3, 4))
+    tools.eq_(src.transfer_to(other), 8)
+    tools.eq_((len(src), len(other)), (1, 1))
+
+
+def test_fd_helpers_raise_prior_io():
+    dut = records.RecordCircBuf(4, 8)
+    dut.write(_records(2, 4))
+    r, w = os.pipe()
+
+    try:
+        os.write(w, bytes(10))
+        tools.assert_raises(ValueError, circbuf.drain_to_fd, dut, w)
+        tools.assert_raises(ValueError, circbuf.fill_from_fd, dut, r)
+        tools.eq_(os.read(r, 16), bytes(10))
+    finally:
+        os.close(r)
+        os.close(w)
+    tools.eq_(dut.read(), _records(2, 4))
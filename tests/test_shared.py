@@ -0,0 +1,81 @@
+from nose import tools
+import multiprocessing
+import pickle
+import circbuf
+from circbuf import shared
+
+
+def _shared(*args, **kwargs):
+    buf = shared.SharedCircBuf(*args, **kwargs)
+    buf._shm.unlink()
+    return buf
+
+
+def test_init():
+    dut = _shared(16)
+
+    tools.ok_(isinstance(dut, circbuf.CircBuf))
+    tools.eq_(len(dut), 0)
+    tools.eq_(dut.capacity, 16)
+    dut.close()
+
+
+@tools.raises(ValueError)
+def test_init_raises_if_not_pwr_of_two():
+    shared.SharedCircBuf(15)
+
+
+def test_attach():
+    buf = shared.SharedCircBuf(16)
+    try:
+        buf.write(bytes(12))
+        buf.read(12)
+        buf.write(b'abc\ndefg')
+        dut = shared.SharedCircBuf(name=buf.name, create=False)
+
+        tools.eq_((dut.capacity, len(dut)), (16, 8))
+        tools.eq_(dut.find(b'\nd'), 3)
+        tools.eq_(dut.read(), b'abc\ndefg')
+        tools.eq_(len(buf), 0)
+        dut.close()
+    finally:
+        buf.close()
+        buf.unlink()
+
+
+def test_pickle_attaches():
+    for sync in ('lock', 'spsc'):
+        buf = shared.SharedCircBuf(16, sync=sync)
+        try:
+            dut = pickle.loads(pickle.dumps(buf))
+
+            tools.eq_(type(dut), type(buf))
+            tools.eq_(dut.name, buf.name)
+            dut.close()
+        finally:
+            buf.close()
+            buf.unlink()
+
+
+def _produce(buf, total):
+    view, written = memoryview(bytes(range(256)) * (total // 256)), 0
+    while written < total:
+        written += buf.write(view[written:written + 1000]) or 0
+    buf.close()
+
+
+def test_cross_process():
+    buf = shared.SharedCircBuf(2 ** 12, sync='spsc')
+    total = 2 ** 18
+    try:
+        process = multiprocessing.get_context().Process(
+            target=_produce, args=(buf, total))
+        process.start()
+        received = bytearray()
+        while len(received) < total:
+            received += buf.read()
+        process.join()
+        tools.eq_(bytes(received), bytes(range(256)) * (total // 256))
+    finally:
+        buf.close()
+        buf.unlink()
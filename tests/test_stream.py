@@ -0,0 +1,102 @@
+from nose import tools
+import csv
+import gzip
+import io
+import pickle
+import threading
+import circbuf
+
+
+def _pipe(size=2 ** 12, **kwargs):
+    buf = circbuf.CircBuf(size)
+    return buf.as_reader(**kwargs), buf.as_writer(**kwargs)
+
+
+def test_read_write():
+    reader, writer = _pipe(16)
+
+    tools.ok_(isinstance(reader, io.RawIOBase))
+    tools.ok_(reader.readable() and not reader.writable())
+    tools.ok_(writer.writable() and not writer.readable())
+    tools.eq_(writer.write(b'abc'), 3)
+    tools.eq_(reader.read(2), b'ab')
+    writer.close()
+    tools.eq_(reader.read(), b'c')
+    tools.eq_(reader.read(), b'')
+
+
+def test_non_blocking():
+    reader, writer = _pipe(16, block=False)
+
+    tools.eq_(reader.read(1), None)
+    tools.eq_(writer.write(bytes(20)), 15)
+    tools.eq_(writer.write(bytes(1)), None)
+    tools.eq_(writer.write(b''), 0)
+
+
+@tools.raises(TimeoutError)
+def test_read_timeout():
+    reader, _ = _pipe(16, timeout=.01)
+    reader.read(1)
+
+
+@tools.raises(TimeoutError)
+def test_write_timeout():
+    _, writer = _pipe(16, timeout=.01)
+    writer.write(bytes(15))
+    writer.write(bytes(1))
+
+
+def test_text_lines_from_thread():
+    reader, writer = _pipe(16)
+    lines = ['line {}\n'.format(i) for i in range(100)]
+
+    def produce():
+        with io.TextIOWrapper(io.BufferedWriter(writer, 8)) as f:
+            f.writelines(lines)
+
+    thread = threading.Thread(target=produce)
+    thread.start()
+    with io.TextIOWrapper(io.BufferedReader(reader)) as f:
+        tools.eq_(list(f), lines)
+    thread.join()
+
+
+def test_pickle():
+    reader, writer = _pipe()
+    obj = {'a': [1, 2, 3], 'b': b'xyz'}
+
+    pickle.dump(obj, writer)
+    tools.eq_(pickle.load(io.BufferedReader(reader)), obj)
+
+
+def test_gzip():
+    reader, writer = _pipe()
+    data = bytes(range(256)) * 4
+
+    with gzip.GzipFile(fileobj=writer, mode='wb') as f:
+        f.write(data)
+    writer.close()
+    with gzip.GzipFile(fileobj=io.BufferedReader(reader)) as f:
+        tools.eq_(f.read(), data)
+
+
+def test_csv():
+    reader, writer = _pipe()
+    rows = [['a', '1'], ['b', '2']]
+
+    with io.TextIOWrapper(writer, newline='') as f:
+        csv.writer(f).writerows(rows)
+    with io.TextIOWrapper(reader, newline='') as f:
+        tools.eq_(list(csv.reader(f)), rows)
+
+
+def test_close_wakes_reader():
+    reader, writer = _pipe(16)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(reader.read(1)))
+    thread.start()
+
+    writer.close()
+    thread.join(1)
+    tools.eq_(result, [b''])